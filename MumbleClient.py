@@ -1,20 +1,41 @@
-import datetime
+import functools
 import json
+import logging
 import os
 import sys
 import time
 import keyboard
 import pyaudio
-import audioop
 import threading
+from typing import NamedTuple
 
 import tkinter as tk
 
-import pymumble_py3
 from pymumble_py3.callbacks import PYMUMBLE_CLBK_SOUNDRECEIVED as PCS
+from pymumble_py3.callbacks import PYMUMBLE_CLBK_USERCREATED, PYMUMBLE_CLBK_USERUPDATED, PYMUMBLE_CLBK_DISCONNECTED
+from pymumble_py3.callbacks import PYMUMBLE_CLBK_USERREMOVED
+from pymumble_py3.constants import PYMUMBLE_CONN_STATE_CONNECTED
+from pymumble_py3.errors import UnknownChannelError
 from pymumble_py3.messages import MoveCmd, ModUserState
 
 import send_event_reports
+from activity_meter import ChannelActivity
+from capture import CaptureFramer
+from channel_index import ChannelIndex
+from command_pipeline import CommandPipeline
+from debouncer import Debouncer
+from encoder_controller import EncoderController
+from jitter_buffer import JitterBuffer
+from listening import ListeningSet
+from loss_concealment import ConcealingSoundQueue, LossStats
+from mixer import Mixer
+from mumble_commands import ConfigureEncoder, Mumble, UserState
+from pending_state import PendingStateTracker
+from reconnect import ReconnectSupervisor
+from vad import SilenceSuppressor, VoiceActivityDetector
+from voice_targets import VoiceTargets
+
+logger = logging.getLogger(__name__)
 
 COLOURS = {
     "red": "#FF0000",
@@ -25,6 +46,16 @@ COLOURS = {
 }
 
 
+class ChannelVisualState(NamedTuple):
+    selected: bool
+    muted: bool
+    listening: bool
+    talking: bool
+    transmitting: bool
+    thickness: int
+    pending: bool
+
+
 class Mumbler:
     def __init__(self, server, nickname, configuration_path):
         with open(configuration_path, 'r', encoding="utf-8") as f:
@@ -40,18 +71,42 @@ class Mumbler:
         self.not_talking_highlight = COLOURS["dark-red"]
         self.talking_highlight = COLOURS["green"]
 
+        self.foreground = "black"
+        self.pending_foreground = COLOURS["dark-red"]
+
         self.window = tk.Tk()
-        self.window.title(f"radio-{nickname}")
+        self.title = f"radio-{nickname}"
+        self.window.title(self.title)
         self.nickname = nickname
         self.exercise_id = configuration["exercise_id"]
         self.frames: dict[str, tk.Frame] = dict()
         self.labels: dict[str, tk.Label] = dict()
 
+        # UI state, written from the audio, keyboard and network threads with plain assignments and drawn by
+        # _render_tick on the Tk thread
         self.current_channel: str = ""
         self.muted: bool = False
         self.listening_channels: set[str] = set()
-
-        self.stop_showing_talking_timer: threading.Timer = None
+        self.i_am_talking: bool = False
+        self.pending_channel: str = None
+        self.connected: bool = True
+        self._rendered_connected: bool = True
+        self.failed_commands = 0
+        self.talking_until: dict[str, float] = dict()
+        self._dirty = True
+
+        self.render_interval_ms = 33
+        self.talking_display_time = 0.1
+        self._rendered_talking_channels: set[str] = set()
+        self._channel_states: dict[str, ChannelVisualState] = dict()
+        self.renders_saved = 0
+
+        self.channel_activity = ChannelActivity()
+        self.meter_interval = 0.1
+        self.meter_height = 6
+        self.meters: dict[str, tuple[tk.Canvas, int, int]] = dict()
+        self._drawn_meters: dict[str, tuple[int, int]] = dict()
+        self._last_meter_draw = 0.0
 
         for user_type in configuration["UserTypes"]:
             if nickname in configuration["UserTypes"][user_type]:
@@ -61,6 +116,7 @@ class Mumbler:
             sys.exit()
 
         self._setup_ui(configuration)
+        self.window.after(self.render_interval_ms, self._render_tick)
 
         self.mumble_client = MumbleClient(server, nickname, gui=self, configuration=configuration)
 
@@ -88,6 +144,12 @@ class Mumbler:
             label.place(anchor="center", relx=0.5, rely=0.5)
             self.labels[channel_name] = label
 
+            meter = tk.Canvas(master=frame, height=self.meter_height, bg=COLOURS["dark-red"], highlightthickness=0)
+            meter.place(anchor="s", relx=0.5, rely=1.0, relwidth=1.0)
+            level_bar = meter.create_rectangle(0, 0, 0, self.meter_height, fill=COLOURS["green"], width=0)
+            peak_marker = meter.create_line(0, 0, 0, self.meter_height, fill=COLOURS["yellow"], width=2)
+            self.meters[channel_name] = (meter, level_bar, peak_marker)
+
         width = frame_width * len(channel_names_and_keys)
         height = frame_height
         xpos = self.window.winfo_screenwidth() - (width + 50)
@@ -99,77 +161,121 @@ class Mumbler:
         self.window.update()
 
     def change_channel(self, channel_data: dict[str]):
-        if channel_data["ChannelName"] == self.current_channel:
-            self.set_all_frame_colours()
-            return
+        if channel_data["ChannelName"] != self.current_channel:
+            send_event_reports.voice_chat_change_channel(self.current_channel, channel_data["ChannelName"],
+                                                         self.nickname, self.exercise_id)
 
-        send_event_reports.voice_chat_change_channel(self.current_channel, channel_data["ChannelName"],
-                                                     self.nickname, self.exercise_id)
+            self.current_channel = channel_data["ChannelName"]
+            self.muted = not channel_data["CanTalk"]
 
-        if self.current_channel != "":
-            self.frames[self.current_channel].config(highlightthickness=self.non_selected_thickness)
+        self.request_render()
 
-        self.current_channel = channel_data["ChannelName"]
-        self.muted = not channel_data["CanTalk"]
+    def command_completed(self, kind: str, succeeded: bool):
+        if kind == "change_channel":
+            self.pending_channel = None
+        if not succeeded:
+            self.failed_commands += 1
+        self.request_render()
 
-        self.frames[self.current_channel].config(highlightthickness=self.selected_thickness)
-
-        self.set_all_frame_colours()
+    def set_connected(self, connected: bool):
+        self.connected = connected
+        self.request_render()
 
     def talk(self, talking: bool = False):
-        if self.current_channel == "":
-            return
-        if talking:
-            self.frames[self.current_channel].config(highlightbackground=self.talking_highlight)
-        else:
-            self.frames[self.current_channel].config(highlightbackground=self.not_talking_highlight)
+        self.i_am_talking = talking
+        self.request_render()
+
+    def request_render(self):
+        """Safe from any thread, the next render tick redraws the widgets"""
+        self._dirty = True
+
+    def show_someone_else_talking(self, channel_name: str):
+        """Called for every received audio packet, so it only records a timestamp for the render tick"""
+        self.talking_until[channel_name] = time.monotonic() + self.talking_display_time
+
+    def _render_tick(self):
+        now = time.monotonic()
+        talking_channels = {channel_name for channel_name, until in list(self.talking_until.items()) if until > now}
+        if self._dirty or talking_channels != self._rendered_talking_channels:
+            self._dirty = False
+            self._rendered_talking_channels = talking_channels
+            self.set_all_frame_colours()
+            if self.connected != self._rendered_connected:
+                self._rendered_connected = self.connected
+                self.window.title(self.title if self.connected else f"{self.title} (reconnecting)")
+
+        if now - self._last_meter_draw >= self.meter_interval:
+            self._last_meter_draw = now
+            self.draw_meters(now)
+
+        self.window.after(self.render_interval_ms, self._render_tick)
+
+    def draw_meters(self, now: float):
+        levels = self.channel_activity.levels(now)
+        for channel_name, (meter, level_bar, peak_marker) in self.meters.items():
+            rms, peak = levels.get(channel_name, (0.0, 0.0))
+            width = meter.winfo_width()
+            # Speech RMS sits well below full scale, so the bar uses a square root scale to stay readable
+            drawn = (round(width * min(rms, 1.0) ** 0.5), round(width * peak))
+            if self._drawn_meters.get(channel_name) == drawn:
+                continue
+
+            meter.coords(level_bar, 0, 0, drawn[0], self.meter_height)
+            meter.coords(peak_marker, drawn[1], 0, drawn[1], self.meter_height)
+            self._drawn_meters[channel_name] = drawn
 
     def set_all_frame_colours(self):
+        """Must only run on the Tk thread, use request_render from elsewhere"""
         for channel_name in self.frames.keys():
-            if channel_name == self.current_channel:
-                if self.muted:
-                    self.set_frame_colour(channel_name, "listening")
-                else:
-                    self.set_frame_colour(channel_name, "talking")
-            else:
-                if channel_name in self.listening_channels:
-                    self.set_frame_colour(channel_name, "listening")
-                else:
-                    self.set_frame_colour(channel_name, "muted")
-
-    def set_frame_colour(self, channel_name: str, type: str):
-        if type == "muted":
-            self.frames[channel_name].config(bg=self.muted_background)
-            self.labels[channel_name].config(bg=self.muted_background)
-        elif type == "listening":
-            self.frames[channel_name].config(bg=self.listening_background)
-            self.labels[channel_name].config(bg=self.listening_background)
-        elif type == "talking":
-            self.frames[channel_name].config(bg=self.talking_background)
-            self.labels[channel_name].config(bg=self.talking_background)
-
-    def show_someone_else_talking(self, channel_name: str, talking: bool = False):
-        if talking:
-            try:
-                self.labels[channel_name].config(bg=self.talking_highlight)
-            except RuntimeError:
-                pass
-            self.stop_showing_talking_timer = threading.Timer(0.1, self.show_someone_else_talking,
-                                                              args=(channel_name, False))
-            self.stop_showing_talking_timer.start()
+            selected = channel_name == self.current_channel
+            state = ChannelVisualState(
+                selected=selected,
+                muted=self.muted if selected else channel_name not in self.listening_channels,
+                listening=selected or channel_name in self.listening_channels,
+                talking=channel_name in self._rendered_talking_channels,
+                transmitting=selected and self.i_am_talking,
+                thickness=self.selected_thickness if selected else self.non_selected_thickness,
+                pending=channel_name == self.pending_channel
+            )
+            if self._channel_states.get(channel_name) == state:
+                self.renders_saved += 1
+                continue
+
+            self._render_channel(channel_name, state)
+            self._channel_states[channel_name] = state
+
+    def _render_channel(self, channel_name: str, state: ChannelVisualState):
+        if state.selected and not state.muted:
+            background = self.talking_background
+        elif state.listening:
+            background = self.listening_background
         else:
-            self.set_all_frame_colours()
+            background = self.muted_background
+
+        self.frames[channel_name].config(bg=background, highlightthickness=state.thickness,
+                                         highlightbackground=self.talking_highlight if state.transmitting
+                                         else self.not_talking_highlight)
+        self.labels[channel_name].config(bg=self.talking_highlight if state.talking else background,
+                                         fg=self.pending_foreground if state.pending else self.foreground)
 
 
 # pyaudio constants
 CHUNKSIZE = 1024
+OUTPUT_CHUNKSIZE = 960  # 20ms, one mixer period
+CAPTURE_FRAME_SIZE = 960  # 20ms, one Opus frame
 FORMAT = pyaudio.paInt16  # pymumble soundchunk.pcm is 16 bits
 PYAUDIO_CHANNELS = 1
 RATE = 48000  # pymumble soundchunk.pcm is 48000Hz
 
+# Command kind -> key of its debounce window in the CommandDebounceMs configuration section
+DEBOUNCE_CONFIG_KEYS = {
+    "change_channel": "ChangeChannel",
+    "change_listening": "ChangeListening"
+}
+
 
 class MumbleClient:
-    def __init__(self, server, nickname, pwd="", gui: Mumbler = None, configuration=None, command_timeout: float = 0.8,
+    def __init__(self, server, nickname, pwd="", gui: Mumbler = None, configuration=None, debounce_window: float = 0.15,
                  exercise_id=20):
         if configuration is None:
             raise Exception(f"Invalid configuration: {configuration}")
@@ -181,9 +287,20 @@ class MumbleClient:
         self.configuration = configuration
         self.gui = gui
 
-        self.mumble: pymumble_py3.Mumble = None  # Defined in _create_mumble_instance
+        self.mumble: Mumble = None  # Defined in _create_mumble_instance
+        self.channel_index = ChannelIndex()
+        self.voice_targets = VoiceTargets()
         self.p: pyaudio.PyAudio = None  # Defined in _setup_audio
         self.streams: dict[str, pyaudio.Stream] = None
+        self.mixer: Mixer = None  # Defined in _setup_audio
+        self.capture: CaptureFramer = None  # Defined in _setup_audio
+        self.vad: VoiceActivityDetector = None  # Defined in _setup_voice_activity_detection
+        self.silence_suppressor: SilenceSuppressor = None  # Defined in _setup_voice_activity_detection
+        self.encoder_controller: EncoderController = None  # Defined in _setup_encoder_controller
+        self.encoder_control_interval: float = 1.0
+        self._last_server_packet_stats = (0, 0, 0)
+        self._last_receive_loss: dict[int, tuple[int, int]] = dict()  # Received and lost counts by session
+        self.encoder_control_thread: threading.Thread = None  # Defined in _setup_encoder_controller
         self.person_type: str = None  # Defined in _setup_keyboard_hooks
 
         self.exercise_id = exercise_id
@@ -191,51 +308,187 @@ class MumbleClient:
         self._muted = False
 
         self.internal_chat = False
-        self.always_talking_thread: threading.Thread = threading.Thread(target=self.always_talking_audio_capture,
-                                                                        daemon=True)
         self.internal_channel: list[str] = None
         self.current_target: list[str] = None
         self.listen: set[str] = set()
-        self.last_command_timestamp = 0
-        self.command_timeout = command_timeout
+        self.listening_channels: set[str] = set()
+        self.listening = ListeningSet()
+        self._listening_requests: list[tuple[list[str], bool]] = list()
+        self._listening_requests_lock = threading.Lock()
+        self.channel_confirm_timeout = 1.0
+        self.talk_move_timeout = 0.1  # Push to talk waits for the move on the keyboard thread
+        self.command_pipeline = CommandPipeline(on_done=self._command_done)
+        self.debouncer = Debouncer(self.command_pipeline.submit, default_window=debounce_window)
+        self.pending_states = PendingStateTracker()
+
+        # Kept across reconnects so that audio and codecs stay warm
+        self.connected = threading.Event()
+        self.reconnect_supervisor = ReconnectSupervisor.from_config(self.configuration.get("Reconnect", {}),
+                                                                    self._create_mumble_instance,
+                                                                    self._restore_state)
+        self._sound_queues: dict[int, ConcealingSoundQueue] = dict()  # By registered user id
+        self._last_channel: str = None
 
         self._setup_audio()
         self._create_mumble_instance()
         self._setup_keyboard_hooks()
+        self._setup_voice_activity_detection()
         self._set_internal_chat()
+        self._setup_voice_targets()
+        self._setup_encoder_controller()
+        self._setup_debouncer()
 
         self._move_to_starting_channel()
+        self.command_pipeline.start()
+        self.debouncer.start()
+        self.reconnect_supervisor.start()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        self.reconnect_supervisor.stop()
+        self.debouncer.stop()
+        self.command_pipeline.stop()
+        self.capture.stop()
         for stream in self.streams.values():
             stream.stop_stream()
             stream.close()
         self.p.terminate()
 
     def _create_mumble_instance(self):
-        self.mumble = pymumble_py3.Mumble(self.server, self.nickname, password=self.pwd)
-        self.mumble.callbacks.set_callback(PCS, self.sound_retriever_handler)
-        self.mumble.set_receive_sound(1)
-        self.mumble.start()
-        self.mumble.is_ready()
+        # Other threads keep using self.mumble, so it is only replaced once the new connection is ready
+        mumble = Mumble(self.server, self.nickname, password=self.pwd)
+        # Reconnects are made from the supervisor thread, but the connection should still end with the application
+        mumble.parent_thread = threading.main_thread()
+        mumble.callbacks.set_callback(PCS, self.sound_retriever_handler)
+        mumble.callbacks.set_callback(PYMUMBLE_CLBK_USERCREATED, self._user_created_handler)
+        mumble.callbacks.set_callback(PYMUMBLE_CLBK_USERUPDATED, self._user_updated_handler)
+        mumble.callbacks.set_callback(PYMUMBLE_CLBK_USERREMOVED, self._user_removed_handler)
+        mumble.callbacks.set_callback(PYMUMBLE_CLBK_DISCONNECTED, functools.partial(self._disconnected_handler, mumble))
+        self.channel_index.attach(mumble)
+        mumble.set_receive_sound(1)
+        mumble.start()
+        mumble.is_ready()
+        if mumble.connected != PYMUMBLE_CONN_STATE_CONNECTED:
+            raise ConnectionError(f"Could not connect to {self.server}")
+
+        if self.encoder_controller is not None:
+            # pymumble's new encoder matches the negotiated codec, give it the tuned settings instead of replacing it
+            mumble.execute_command(ConfigureEncoder(self.encoder_controller.settings), blocking=False)
+        self.mumble = mumble
+        self.connected.set()
+        self.gui.set_connected(True)
+
+    def _disconnected_handler(self, mumble: Mumble):
+        self.connected.clear()
+        myself = mumble.users.myself
+        if myself is not None:
+            try:
+                self._last_channel = self.channel_index.name_of(myself["channel_id"])
+            except UnknownChannelError:
+                # Keep the previous channel, reconnecting matters more than where to
+                pass
+        self.gui.set_connected(False)
+        self.reconnect_supervisor.disconnected()
+
+    def _restore_state(self):
+        """Replays the channel, mute state, listening set and voice targets after a reconnect in one batch"""
+        self.listening.reset()
+        self.voice_targets.replay(self.mumble, self.channel_index)
+        if self._already_speaking and self.internal_chat and self.current_target is not None:
+            self.mumble.sound_output.target = self.voice_targets.target_for(self.current_target[0]) or 0
+
+        channel_id = self.channel_index.id_of(self._last_channel) if self._last_channel is not None \
+            else self.mumble.users.myself["channel_id"]
+        desired_listening = set(self.channel_index.ids_of(self.listening_channels))
+        parameters = {"channel_id": channel_id, "self_mute": self._muted,
+                      **self.listening.update(desired_listening)}
+
+        pending = self.pending_states.expect("reconnect", lambda user: user["channel_id"] == channel_id and
+                                             self.listening.confirmed == desired_listening, self.mumble.users.myself)
+        self.mumble.execute_command(UserState(self.mumble.users.myself_session, parameters), blocking=False)
+        if not self.pending_states.wait(pending, self.channel_confirm_timeout):
+            # Counted as a failed restore by the supervisor instead of as a recovery
+            raise TimeoutError("Restored state was not confirmed")
+
+    def get_recovery_times(self) -> list[float]:
+        return list(self.reconnect_supervisor.recovery_times)
+
+    def _user_created_handler(self, user):
+        # Reuse the decoders of registered users we already heard before a reconnect, names are not unique enough
+        user_id = user.get("user_id")
+        sound_queue = self._sound_queues.get(user_id) if user_id is not None else None
+        if sound_queue is None:
+            sound_queue = ConcealingSoundQueue(user.mumble_object)
+            if user_id is not None:
+                self._sound_queues[user_id] = sound_queue
+        else:
+            sound_queue.rebind(user.mumble_object)
+        user.sound = sound_queue
+
+    def _user_removed_handler(self, user, message):
+        # Users leaving the server are not coming back with a reconnect, a dropped connection removes nobody
+        self._sound_queues.pop(user.get("user_id"), None)
+
+    def _user_updated_handler(self, user, actions: dict):
+        if user["session"] == user.mumble_object.users.myself_session:
+            self.listening.user_updated(user)
+            self.pending_states.user_updated(user)
+
+    def _move(self, channel_id: int, timeout: float = None):
+        """
+        Moves to channel_id and waits until the server reports it, raises TimeoutError if it does not within timeout,
+        channel_confirm_timeout by default
+        """
+        pending = self.pending_states.expect("channel", lambda user: user["channel_id"] == channel_id,
+                                             self.mumble.users.myself)
+        if pending.confirmed:
+            return
+        self.mumble.execute_command(MoveCmd(self.mumble.users.myself_session, channel_id), blocking=False)
+        if not self.pending_states.wait(pending, self.channel_confirm_timeout if timeout is None else timeout):
+            raise TimeoutError(f"Move to channel {channel_id} was not confirmed")
+
+    def get_latency_stats(self) -> dict[str, dict[str, int]]:
+        return {kind: self.pending_states.latency_histogram(kind) for kind in ("channel", "listening", "reconnect")}
+
+    def _command_done(self, kind: str, error: Exception):
+        if error is not None:
+            logger.warning("Command %s failed", kind, exc_info=error)
+        # A newer intent of the same kind is still queued, it reports when it is done
+        if not self.command_pipeline.pending(kind) and not self.debouncer.pending(kind):
+            self.gui.command_completed(kind, error is None)
+
+    def get_loss_stats(self) -> dict[int, LossStats]:
+        return {session: user.sound.stats for session, user in list(self.mumble.users.items())
+                if isinstance(user.sound, ConcealingSoundQueue)}
 
     def _setup_audio(self):
         self.p = pyaudio.PyAudio()
         self.streams = dict()
-        self._open_new_audio_stream("i_am_talking")
-
-    def _open_new_audio_stream(self, person):
-        self.streams[person] = self.p.open(format=FORMAT,
-                                           channels=PYAUDIO_CHANNELS,
-                                           rate=RATE,
-                                           input=True,
-                                           output=True,
-                                           frames_per_buffer=CHUNKSIZE)
+        self.capture = CaptureFramer(self._on_captured_frame, frame_size=CAPTURE_FRAME_SIZE)
+        self.capture.start()
+        self.streams["i_am_talking"] = self.p.open(format=FORMAT,
+                                                   channels=PYAUDIO_CHANNELS,
+                                                   rate=RATE,
+                                                   input=True,
+                                                   frames_per_buffer=CHUNKSIZE,
+                                                   stream_callback=self.capture.callback)
+
+        self.mixer = Mixer(self._new_jitter_buffer)
+        self.streams["output"] = self.p.open(format=FORMAT,
+                                             channels=PYAUDIO_CHANNELS,
+                                             rate=RATE,
+                                             output=True,
+                                             frames_per_buffer=OUTPUT_CHUNKSIZE,
+                                             stream_callback=self.mixer.callback)
+
+    def _new_jitter_buffer(self) -> JitterBuffer:
+        jitter_buffer_config = self.configuration.get("JitterBuffer", {})
+        return JitterBuffer(min_delay=jitter_buffer_config.get("MinDelayMs", 20) / 1000,
+                            max_delay=jitter_buffer_config.get("MaxDelayMs", 200) / 1000,
+                            comfort_noise_time=jitter_buffer_config.get("ComfortNoiseMs", 2000) / 1000)
 
     def _setup_keyboard_hooks(self):
         for speak_key in self.configuration["speak"]:
             try:
-                keyboard.add_hotkey(speak_key, self.audio_capture)
                 keyboard.on_press_key(speak_key, self._start_talking)
                 keyboard.on_release_key(speak_key, self._stop_talking)
             except ValueError:
@@ -243,12 +496,12 @@ class MumbleClient:
 
         keyboard.add_hotkey(
             self.configuration["StartListening"],
-            self.change_channel_listening_status,
+            self.request_listening_status,
             args=([], True)
         )
         keyboard.add_hotkey(
             self.configuration["StopListening"],
-            self.change_channel_listening_status,
+            self.request_listening_status,
             args=([], False)
         )
 
@@ -274,58 +527,183 @@ class MumbleClient:
         if person_type is not None:
             self.person_type = person_type
             for hook in self.configuration["UserTypeConfigurations"][person_type]:
-                keyboard.add_hotkey(hook, self.change_channel, args=(
+                keyboard.add_hotkey(hook, self.request_channel_change, args=(
                     self.configuration["UserTypeConfigurations"][person_type][hook],))
 
+    def _user_type_settings(self, section: str) -> dict:
+        """The "Default" entry of a per user type configuration section, overridden by this user type's entry"""
+        section_config = self.configuration.get(section, {})
+        return {**section_config.get("Default", {}), **section_config.get(self.person_type, {})}
+
+    def _setup_voice_activity_detection(self):
+        vad_config = self._user_type_settings("VoiceActivityDetection")
+        frame_duration = CAPTURE_FRAME_SIZE / RATE
+        self.vad = VoiceActivityDetector.from_config(vad_config, frame_duration=frame_duration)
+        if self.silence_suppressor is None:
+            self.silence_suppressor = SilenceSuppressor(self.vad)
+        else:
+            # Keep the suppression counters across configuration reloads
+            self.silence_suppressor.vad = self.vad
+
+    def _setup_encoder_controller(self):
+        encoder_control_config = self._user_type_settings("EncoderControl")
+        self.encoder_control_interval = encoder_control_config.get("IntervalSeconds", 1.0)
+        if not encoder_control_config.get("Enabled", True):
+            self.encoder_controller = None
+            return
+        # Always talking users get Opus DTX unless configured otherwise, which lets the encoder shrink the hang time
+        # frames after speech that only carry background noise
+        self.encoder_controller = EncoderController.from_config(encoder_control_config, dtx=self.internal_chat)
+        if self.encoder_control_thread is None or not self.encoder_control_thread.is_alive():
+            self.encoder_control_thread = threading.Thread(target=self._encoder_control_loop, daemon=True)
+            self.encoder_control_thread.start()
+
+    def _encoder_control_loop(self):
+        last_wall, last_cpu = time.monotonic(), time.process_time()
+        while True:
+            time.sleep(self.encoder_control_interval)
+
+            # Python audio work is bound to a single core by the GIL, so measure our share of one core
+            wall, cpu_time = time.monotonic(), time.process_time()
+            cpu = (cpu_time - last_cpu) / max(wall - last_wall, 1e-6)
+            last_wall, last_cpu = wall, cpu_time
+
+            try:
+                self._encoder_control_tick(cpu)
+            except Exception:
+                # Keep tuning on the next tick, a dead thread would also break the next configuration reload
+                logger.exception("Encoder control tick failed")
+
+    def _encoder_control_tick(self, cpu: float):
+        mumble = self.mumble
+        controller = self.encoder_controller
+        if controller is None or not self.connected.is_set() or mumble.sound_output.encoder is None:
+            return
+
+        loss = self._upstream_loss(mumble)
+        rtt = mumble.ping_stats.get("avg", 0.0)
+        settings = controller.update(loss, rtt, cpu)
+        # Applied on pymumble's thread, which is the one encoding with it
+        mumble.execute_command(ConfigureEncoder(settings), blocking=False)
+
+    def _upstream_loss(self, mumble: Mumble) -> float:
+        """
+        Loss of our own audio as counted by the server in its ping replies. pymumble tunnels audio over TCP, where
+        the server reports no counts, so the loss concealed on the receive side (other speakers' audio reaching
+        us) is used as a proxy for the state of the network then.
+        """
+        # Per session, so that users leaving do not take their counts out of the sums, and a pooled queue seen
+        # under a new session only counts from then on
+        new_received = new_concealed = 0
+        last_receive_loss = dict()
+        for session, stats in self.get_loss_stats().items():
+            received, lost = last_receive_loss[session] = (stats.received, stats.lost)
+            last_received, last_lost = self._last_receive_loss.get(session, (received, lost))
+            new_received += max(received - last_received, 0)
+            new_concealed += max(lost - last_lost, 0)
+        self._last_receive_loss = last_receive_loss
+
+        good, late, lost = mumble.server_packet_stats
+        last_good, last_late, last_lost = self._last_server_packet_stats
+        self._last_server_packet_stats = (good, late, lost)
+        # The counts start again on a new connection
+        new_good, new_late, new_lost = max(good - last_good, 0), max(late - last_late, 0), max(lost - last_lost, 0)
+        if new_good + new_late + new_lost > 0:
+            return (new_late + new_lost) / (new_good + new_late + new_lost)
+        return new_concealed / (new_received + new_concealed) if new_received + new_concealed > 0 else 0.0
+
+    def _setup_debouncer(self):
+        debounce_config = self.configuration.get("CommandDebounceMs", {})
+        self.debouncer.windows = {kind: debounce_config[key] / 1000 for kind, key in DEBOUNCE_CONFIG_KEYS.items()
+                                  if key in debounce_config}
+
     def _set_internal_chat(self):
         for channel_num in self.configuration["UserTypeConfigurations"][self.person_type]:
             channel_config = self.configuration["UserTypeConfigurations"][self.person_type][channel_num]
             if "AlwaysTalking" in channel_config and channel_config["AlwaysTalking"]:
                 self.internal_chat = True
                 self.internal_channel = [channel_config["ChannelName"]]
-                self.always_talking_thread.start()
                 return
 
+    def _setup_voice_targets(self):
+        # Only always talking users transmit to a channel other than the one they are in
+        if not self.internal_chat:
+            return
+        channel_names = [channel_config["ChannelName"] for channel_config in
+                         self.configuration["UserTypeConfigurations"][self.person_type].values()]
+        self.voice_targets.register(self.mumble, self.channel_index, channel_names)
+
     def _move_to_starting_channel(self):
+        # Queued like a hotkey switch, so a move the server does not confirm is counted as failed instead of raising
         if not self.internal_chat:
-            self.change_channel((channel_data := self.configuration["UserTypeConfigurations"][self.person_type][
-                list(self.configuration["UserTypeConfigurations"][self.person_type].keys())[0]]))
+            self.command_pipeline.submit("change_channel", self.change_channel, (
+                channel_data := self.configuration["UserTypeConfigurations"][self.person_type][
+                    list(self.configuration["UserTypeConfigurations"][self.person_type].keys())[0]]))
             self.gui.change_channel(channel_data)
         else:
             for channel_num in self.configuration["UserTypeConfigurations"][self.person_type]:
                 channel_config = self.configuration["UserTypeConfigurations"][self.person_type][channel_num]
                 if "AlwaysTalking" in channel_config and channel_config["AlwaysTalking"]:
-                    self.change_channel(channel_config)
+                    self.command_pipeline.submit("change_channel", self.change_channel, channel_config)
 
     def _start_talking(self, key_event: keyboard.KeyboardEvent):
-        if not self._already_speaking and not self._muted:
+        if not self._already_speaking and not self._muted and self.connected.is_set():
+            talking_channel = self.mumble.my_channel()["name"]
             if self.internal_chat and self.current_target is not None:
-                self.mumble.execute_command(MoveCmd(self.mumble.users.myself_session,
-                                                    self.mumble.channels.find_by_name(self.current_target[0])[
-                                                        "channel_id"]))
-                time.sleep(0.1)  # Ensures that we have finished moving channels before sending the message
-            send_event_reports.voice_chat_change_recording(0, self.mumble.my_channel()["name"], self.nickname,
+                talking_channel = self.current_target[0]
+                target_id = self.voice_targets.target_for(talking_channel)
+                if target_id is not None:
+                    # Whisper to the channel instead of moving there
+                    self.mumble.sound_output.target = target_id
+                else:
+                    # Ensures that we have finished moving channels before sending the message
+                    try:
+                        self._move(self.channel_index.id_of(talking_channel), self.talk_move_timeout)
+                    except TimeoutError:
+                        # Talk anyway, the move is still on its way to the server
+                        pass
+            send_event_reports.voice_chat_change_recording(0, talking_channel, self.nickname,
                                                            exercise_id=self.exercise_id)
             self._already_speaking = True
             self.gui.talk(True)
 
     def _stop_talking(self, key_event: keyboard.KeyboardEvent):
         if not self._muted:
-            if self.internal_chat:
-                # Move back to internal channel
-                target_channel = self.mumble.channels.find_by_name(self.internal_channel[0])
-                self.mumble.execute_command(MoveCmd(self.mumble.users.myself_session, target_channel["channel_id"]))
-            send_event_reports.voice_chat_change_recording(1, self.mumble.my_channel()["name"], self.nickname,
-                                                           exercise_id=self.exercise_id)
             self._already_speaking = False
+            talking_channel = self._last_channel
+            if self.connected.is_set():
+                talking_channel = self.mumble.my_channel()["name"]
+                sound_output = self.mumble.sound_output
+                if self.internal_chat and sound_output.target != 0:
+                    talking_channel = self.voice_targets.channel_for(sound_output.target)
+                    # The frames still buffered in pymumble belong to the whisper, so only switch back to normal
+                    # talking once they have been sent
+                    threading.Timer(sound_output.get_buffer_size() + sound_output.get_audio_per_packet(),
+                                    self._end_whisper, args=(sound_output,)).start()
+                elif self.internal_chat:
+                    # Move back to internal channel
+                    self.mumble.execute_command(MoveCmd(self.mumble.users.myself_session,
+                                                        self.channel_index.id_of(self.internal_channel[0])),
+                                                blocking=False)
+            send_event_reports.voice_chat_change_recording(1, talking_channel, self.nickname,
+                                                           exercise_id=self.exercise_id)
             self.gui.talk(False)
 
+    def _end_whisper(self, sound_output):
+        # Pressing the speak key again in the meantime has set the target it needs
+        if not self._already_speaking:
+            sound_output.target = 0
+
     def update_configuration(self, configuration: dict):
         self.configuration = configuration
 
         keyboard.unhook_all()
 
         self._setup_keyboard_hooks()
+        self._setup_voice_activity_detection()
+        self._setup_voice_targets()
+        self._setup_encoder_controller()
+        self._setup_debouncer()
 
     def always_listening(self, channels: list[str] = None, listen: bool = True):
         if (channels == None or channels == []) and self.current_target is not None:
@@ -336,102 +714,143 @@ class MumbleClient:
         else:
             self.listen.difference_update(channels)
 
+    def request_listening_status(self, channels: list[str] = None, listen: bool = True):
+        """
+        Hotkey handler. Start and stop requests are queued in order and applied together as one listening change, so
+        a stop coalesced with a start still undoes it instead of replacing it
+        """
+        with self._listening_requests_lock:
+            self._listening_requests.append((channels, listen))
+        self.debouncer.submit("change_listening", self._apply_listening_requests)
+
+    def _apply_listening_requests(self):
+        with self._listening_requests_lock:
+            requests, self._listening_requests = self._listening_requests, list()
+        if not requests:
+            return
+        if not self.connected.is_set():
+            raise ConnectionError("Not connected to the server")
+
+        listening_channels = set(self.listening_channels)
+        for channels, listen in requests:
+            listening_channels = self._listening_after(listening_channels, channels, listen)
+        self.set_listening_channels(listening_channels)
+
     def change_channel_listening_status(self, channels: list[str] = None, listen: bool = True):
+        if not self.connected.is_set():
+            raise ConnectionError("Not connected to the server")
+        self.set_listening_channels(self._listening_after(self.listening_channels, channels, listen))
+
+    def _listening_after(self, listening_channels: set[str], channels: list[str], listen: bool) -> set[str]:
         if channels is None or len(channels) == 0:
             channels = [self.mumble.my_channel()["name"]]
 
-        channel_ids = []
-        for channel_name in channels:
-            channel_ids.append(self.mumble.channels.find_by_name(channel_name)["channel_id"])
-
         if listen:
-            cmd = "listening_channel_add"
-            self.gui.listening_channels |= set(channels)
-            self.gui.set_all_frame_colours()
-        else:
-            for channel in channels:
-                if channel in self.listen:
-                    channels.remove(channel)
-            cmd = "listening_channel_remove"
-            self.gui.listening_channels.difference_update(channels)
-            self.gui.set_all_frame_colours()
+            return listening_channels | set(channels)
+        # Channels we are always listening to stay
+        return listening_channels - (set(channels) - self.listen)
+
+    def set_listening_channels(self, channels: set[str]):
+        """
+        Sends the difference with the server confirmed listening set as one ModUserState and waits for it, raises
+        TimeoutError if the server does not confirm it
+        """
+        self.listening_channels = set(channels)
+        self.gui.listening_channels = set(channels)
+        self.gui.request_render()
+
+        desired = set(self.channel_index.ids_of(channels))
+        parameters = self.listening.update(desired)
+        if not parameters:
+            return
 
+        pending = self.pending_states.expect("listening", lambda user: self.listening.confirmed == desired,
+                                             self.mumble.users.myself)
         self.mumble.execute_command(
             ModUserState(
                 self.mumble.users.myself_session, {
                     "session": self.mumble.users.myself_session,
-                    cmd: channel_ids
+                    **parameters
                 }
-            )
+            ),
+            blocking=False
         )
+        if not self.pending_states.wait(pending, self.channel_confirm_timeout):
+            raise TimeoutError("Listening change was not confirmed")
+
+    def request_channel_change(self, channel_data):
+        """Hotkey handler, the switch itself runs on the command pipeline once the keys have been quiet for a moment"""
+        self.gui.pending_channel = channel_data["ChannelName"]
+        self.gui.request_render()
+        self.debouncer.submit("change_channel", self.change_channel, channel_data)
 
     def change_channel(self, channel_data):
         # self.stop_all_listening()
-        current_time = datetime.datetime.now().timestamp()
-        if current_time - self.last_command_timestamp < self.command_timeout:
-            return
-        self.last_command_timestamp = current_time
+        if not self.connected.is_set():
+            raise ConnectionError("Not connected to the server")
         if channel_data["ChannelName"] == self.mumble.my_channel()["name"] or (
                 self.internal_chat and self.current_target == [channel_data["ChannelName"]]):
             if self.internal_chat and self.current_target is not None:
-                stop_listening_targets = list(set(self.current_target) - self.listen)
+                stop_listening_targets = set(self.current_target) - self.listen
                 self.current_target = [channel_data["ChannelName"]]
-                self.change_channel_listening_status(stop_listening_targets, False)
+                self.set_listening_channels(self.listening_channels - stop_listening_targets)
                 self.gui.change_channel(channel_data)
             return
 
         if self.internal_chat and self.mumble.my_channel()["name"] != "Root":
+            # Stop listening to the old target and start listening to the new one in a single update
+            listening_channels = set(self.listening_channels)
             if self.current_target is not None:
-                stop_listening_targets = list(set(self.current_target) - self.listen)
-            else:
-                stop_listening_targets = self.current_target
-            self.change_channel_listening_status(stop_listening_targets, False)
+                listening_channels -= set(self.current_target) - self.listen
             if channel_data["CanTalk"]:
-                self.current_target = [self.mumble.channels.find_by_name(channel_data["ChannelName"])["name"]]
-            self.change_channel_listening_status(self.current_target, True)
+                self.current_target = [self.channel_index.channel(channel_data["ChannelName"])["name"]]
+            if self.current_target is not None:
+                listening_channels |= set(self.current_target)
+            self.set_listening_channels(listening_channels)
         else:
-            self.mumble.execute_command(
-                MoveCmd(self.mumble.users.myself_session,
-                        self.mumble.channels.find_by_name(channel_data["ChannelName"])["channel_id"]))
+            # Raises on timeout, so the command counts as failed and the mute state is left alone
+            self._move(self.channel_index.id_of(channel_data["ChannelName"]))
 
-        time.sleep(0.1)
-        if self.mumble.my_channel()["name"] == channel_data["ChannelName"] or self.internal_chat:
-            if channel_data["CanTalk"]:
-                self.mumble.users[self.mumble.users.myself_session].unmute()
-                self._muted = False
-            else:
-                self.mumble.users[self.mumble.users.myself_session].mute()
-                self._muted = True
+        self._muted = not channel_data["CanTalk"]
+        self._set_self_mute(self._muted)
 
-            self.gui.change_channel(channel_data)
+        self.gui.change_channel(channel_data)
 
         if self.internal_chat:
             self.gui.change_channel(channel_data)
         # if "ListeningChannels" in channel_data:
         #     self.start_listening_to_channels(channel_data["ListeningChannels"])
 
+    def _set_self_mute(self, muted: bool):
+        # Not blocking, a command queued on a connection that just dropped would never be answered
+        self.mumble.execute_command(
+            ModUserState(
+                self.mumble.users.myself_session, {
+                    "session": self.mumble.users.myself_session,
+                    "self_mute": muted
+                }
+            ),
+            blocking=False
+        )
+
     def sound_retriever_handler(self, user, soundchunk):
-        if type(self.gui.stop_showing_talking_timer) == threading.Timer:
-            self.gui.stop_showing_talking_timer.cancel()
-        talking_channel = self.mumble.channels[user["channel_id"]]["name"]
-        self.gui.show_someone_else_talking(talking_channel, True)
-        try:
-            self.streams[user["session"]].write(soundchunk.pcm)
-        except KeyError:
-            self._open_new_audio_stream(user["session"])
-            self.streams[user["session"]].write(soundchunk.pcm)
-
-    def always_talking_audio_capture(self):
-        while True:
-            self.audio_capture()
-
-    def audio_capture(self):
-        starting_time = time.time()
-        while time.time() - starting_time < 0.05:
-            data = self.streams["i_am_talking"].read(CHUNKSIZE, exception_on_overflow=False)
-            rms = audioop.rms(data, 2)
-            if rms > 200:
-                self.mumble.sound_output.add_sound(data)
+        talking_channel = self.channel_index.name_of(user["channel_id"])
+        self.gui.show_someone_else_talking(talking_channel)
+        self.gui.channel_activity.record(talking_channel, soundchunk.pcm)
+        self.mixer.push(user["session"], soundchunk.sequence, soundchunk.pcm)
+
+    def _on_captured_frame(self, frame: bytes):
+        # Nobody sends anything during silence, listeners fill the pauses with comfort noise themselves
+        processor = self.silence_suppressor if self.internal_chat else self.vad
+        if processor is None:
+            return
+        # The detector sees every frame so that its noise floor keeps tracking the room between transmissions
+        frames = processor.process(frame)
+        # Always talking users transmit continuously, everyone else only while holding a speak key
+        if not (self._already_speaking or self.internal_chat) or not self.connected.is_set():
+            return
+        for speech_frame in frames:
+            self.mumble.sound_output.add_sound(speech_frame)
 
 
 def check_configuration_update(mumble_client: MumbleClient, configuration_path: str, last_update_time: float,
@@ -0,0 +1,46 @@
+import audioop
+import math
+import time
+
+SAMPLE_WIDTH = 2  # pymumble soundchunk.pcm is 16 bits
+FULL_SCALE = 32768
+
+
+class ChannelActivity:
+    """
+    Per channel audio levels for the activity meters. record runs on the receive path and folds each packet's RMS
+    and peak into the channel's level, which decays exponentially with decay_time (hold_time for the peak). levels
+    applies the decay up to now, so the UI only reads a few floats per channel however busy the channels are.
+    Levels are normalised to 0..1 of full scale.
+    """
+
+    def __init__(self, decay_time: float = 0.3, hold_time: float = 1.0):
+        self.decay_time = decay_time
+        self.hold_time = hold_time
+
+        # channel name -> (rms, peak, time), replaced as a whole so readers never see a half updated entry
+        self._levels: dict[str, tuple[float, float, float]] = dict()
+
+    def record(self, channel_name: str, pcm: bytes, now: float = None):
+        if now is None:
+            now = time.monotonic()
+
+        rms = audioop.rms(pcm, SAMPLE_WIDTH) / FULL_SCALE
+        peak = audioop.max(pcm, SAMPLE_WIDTH) / FULL_SCALE
+
+        previous = self._levels.get(channel_name)
+        if previous is not None:
+            previous_rms, previous_peak = self._decayed(previous, now)
+            rms = max(rms, previous_rms)
+            peak = max(peak, previous_peak)
+        self._levels[channel_name] = (rms, min(peak, 1.0), now)
+
+    def levels(self, now: float = None) -> dict[str, tuple[float, float]]:
+        if now is None:
+            now = time.monotonic()
+        return {channel_name: self._decayed(level, now) for channel_name, level in list(self._levels.items())}
+
+    def _decayed(self, level: tuple[float, float, float], now: float) -> tuple[float, float]:
+        rms, peak, then = level
+        elapsed = max(now - then, 0.0)
+        return rms * math.exp(-elapsed / self.decay_time), peak * math.exp(-elapsed / self.hold_time)
@@ -0,0 +1,6 @@
+"""
+Offline benchmarks for the client's audio pipeline.
+
+Run from the repository root with `python -m benchmarks.audio_pipeline`. No sound card or Mumble server is needed:
+PyAudio and pymumble are replaced by the stubs in benchmarks.stubs.
+"""
@@ -0,0 +1,205 @@
+"""
+Measures the per frame cost of the capture (ring buffer -> VAD -> encode) and receive
+(concealment/decode -> jitter buffer -> mix) paths with synthetic or WAV PCM.
+
+For every stage it reports latency percentiles, frames per second of wall and CPU time, traced memory churn per
+frame (tracemalloc) and the garbage collections run during the timed pass.
+
+    python -m benchmarks.audio_pipeline [--wav speech.wav] [--frames 3000] [--speakers 8] [--loss 0.05]
+"""
+import argparse
+import audioop
+import gc
+import math
+import random
+import statistics
+import time
+import tracemalloc
+import wave
+
+from benchmarks import stubs
+
+stubs.install()
+
+from capture import RingBuffer  # NOQA: E402
+from jitter_buffer import JitterBuffer  # NOQA: E402
+from mixer import Mixer  # NOQA: E402
+from vad import VoiceActivityDetector  # NOQA: E402
+
+RATE = 48000
+FRAME_SIZE = 960  # 20ms
+FRAME_BYTES = FRAME_SIZE * 2
+SEQUENCES_PER_FRAME = 2
+TRACED_FRAMES = 200
+
+
+def synthetic_pcm(frames: int, seed: int = 0) -> list[bytes]:
+    """Alternating one second talk spurts (harmonic, amplitude modulated) and room noise"""
+    rng = random.Random(seed)
+    pcm = []
+    for frame_index in range(frames):
+        talking = (frame_index // 50) % 2 == 0
+        samples = []
+        for i in range(FRAME_SIZE):
+            t = (frame_index * FRAME_SIZE + i) / RATE
+            value = rng.gauss(0, 60)
+            if talking:
+                envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 4 * t)
+                value += envelope * sum(3000 / h * math.sin(2 * math.pi * 150 * h * t) for h in range(1, 6))
+            samples.append(max(-32768, min(32767, int(value))))
+        pcm.append(b"".join(sample.to_bytes(2, "little", signed=True) for sample in samples))
+    return pcm
+
+
+def wav_pcm(path: str, frames: int) -> list[bytes]:
+    with wave.open(path, "rb") as wav:
+        data = wav.readframes(wav.getnframes())
+        width, channels, rate = wav.getsampwidth(), wav.getnchannels(), wav.getframerate()
+    if width != 2:
+        data = audioop.lin2lin(data, width, 2)
+    if channels == 2:
+        data = audioop.tomono(data, 2, 0.5, 0.5)
+    if rate != RATE:
+        data, _ = audioop.ratecv(data, 2, 1, rate, RATE, None)
+
+    pcm = [data[i:i + FRAME_BYTES] for i in range(0, len(data) - FRAME_BYTES + 1, FRAME_BYTES)]
+    if not pcm:
+        raise ValueError(f"{path} is shorter than one frame")
+    return [pcm[i % len(pcm)] for i in range(frames)]
+
+
+class Result:
+    def __init__(self, name: str, latencies_ns: list[int], wall: float, cpu: float, churn: float,
+                 retained: float, collections: list[int]):
+        self.name = name
+        self.percentiles = statistics.quantiles(latencies_ns, n=100)
+        self.frames = len(latencies_ns)
+        self.wall = wall
+        self.cpu = cpu
+        self.churn = churn
+        self.retained = retained
+        self.collections = collections
+
+    def row(self) -> str:
+        p50, p90, p99 = (self.percentiles[i] / 1000 for i in (49, 89, 98))
+        return (f"{self.name:<28}{p50:>9.1f}{p90:>9.1f}{p99:>9.1f}"
+                f"{self.frames / self.wall:>13.0f}{self.frames / max(self.cpu, 1e-9):>14.0f}"
+                f"{self.churn:>11.0f}{self.retained:>10.1f}   {'/'.join(map(str, self.collections))}")
+
+
+HEADER = (f"{'stage':<28}{'p50 us':>9}{'p90 us':>9}{'p99 us':>9}{'frames/s':>13}{'frames/cpu-s':>14}"
+          f"{'churn B':>11}{'kept B':>10}   gc gen0/1/2")
+
+
+def measure(name: str, step, inputs: list) -> Result:
+    for item in inputs[:50]:
+        step(item)
+
+    collections = [0, 0, 0]
+
+    def count_collection(phase, info):
+        if phase == "start":
+            collections[info["generation"]] += 1
+
+    latencies = []
+    gc.callbacks.append(count_collection)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for item in inputs:
+        start = time.perf_counter_ns()
+        step(item)
+        latencies.append(time.perf_counter_ns() - start)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    gc.callbacks.remove(count_collection)
+
+    # Separate pass, since tracing slows every allocation down
+    churn = retained = 0
+    traced = inputs[:TRACED_FRAMES]
+    tracemalloc.start()
+    for item in traced:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step(item)
+        current, peak = tracemalloc.get_traced_memory()
+        churn += peak - before
+        retained += current - before
+    tracemalloc.stop()
+
+    return Result(name, latencies, wall, cpu, churn / len(traced), retained / len(traced), collections)
+
+
+def load_codec():
+    try:
+        import opuslib
+        encoder = opuslib.Encoder(RATE, 1, "voip")
+        decoder = opuslib.Decoder(RATE, 1)
+    except Exception as e:
+        print(f"Skipping the codec stages, libopus is unavailable: {e}")
+        return None, None
+    return encoder, decoder
+
+
+def run(pcm: list[bytes], speakers: int, loss: float) -> list[Result]:
+    results = []
+
+    ring = RingBuffer(FRAME_BYTES * 50)
+    vad = VoiceActivityDetector()
+
+    def capture_step(frame):
+        ring.write(frame)
+        vad.process(ring.read(FRAME_BYTES))
+
+    results.append(measure("capture: ring + vad", capture_step, pcm))
+
+    encoder, decoder = load_codec()
+    received = pcm
+    if encoder is not None:
+        packets = [encoder.encode(frame, FRAME_SIZE) for frame in pcm]
+        out_buffer = bytearray(4000)
+        results.append(measure("capture: encode_into",
+                               lambda frame: encoder.encode_into(frame, FRAME_SIZE, out_buffer), pcm))
+
+        pcm_buffer = bytearray(FRAME_BYTES)
+        results.append(measure("receive: decode_into",
+                               lambda packet: decoder.decode_into(packet, pcm_buffer, FRAME_SIZE), packets))
+
+        from loss_concealment import ConcealingSoundQueue
+
+        rng = random.Random(1)
+        sequenced = [(i * SEQUENCES_PER_FRAME, packet) for i, packet in enumerate(packets) if rng.random() >= loss]
+        queue = ConcealingSoundQueue(None)
+        received = []
+        results.append(measure(f"receive: conceal ({loss:.0%} loss)",
+                               lambda item: received.append(queue.add(item[1], item[0], 4, 0).pcm), sequenced))
+
+    mixer = Mixer(JitterBuffer)
+    sequence = [0]
+
+    def mix_step(frame):
+        for session in range(speakers):
+            mixer.push(session, sequence[0], frame)
+        sequence[0] += SEQUENCES_PER_FRAME
+        mixer.mix(FRAME_BYTES)
+
+    results.append(measure(f"receive: jitter + mix x{speakers}", mix_step,
+                           [frame[:FRAME_BYTES].ljust(FRAME_BYTES, b"\0") for frame in received]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", help="16 bit WAV file to use instead of synthetic speech")
+    parser.add_argument("--frames", type=int, default=3000, help="Number of 20ms frames per stage")
+    parser.add_argument("--speakers", type=int, default=8, help="Simultaneous speakers in the mix stage")
+    parser.add_argument("--loss", type=float, default=0.05, help="Simulated packet loss for the concealment stage")
+    args = parser.parse_args()
+
+    pcm = wav_pcm(args.wav, args.frames) if args.wav else synthetic_pcm(args.frames)
+
+    results = run(pcm, args.speakers, args.loss)
+    print(HEADER)
+    for result in results:
+        print(result.row())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Minimal stand-ins for pyaudio and pymumble_py3, so that the audio modules can be imported and driven headless.
+Only what those modules touch is provided. The pymumble SoundQueue stub decodes the same way the real one does.
+"""
+import sys
+import threading
+import time
+import types
+
+PYMUMBLE_SAMPLERATE = 48000
+PYMUMBLE_SEQUENCE_DURATION = 10 / 1000
+PYMUMBLE_AUDIO_TYPE_OPUS = 4
+PYMUMBLE_READ_BUFFER_SIZE = 4096
+
+
+class SoundChunk:
+    def __init__(self, pcm, sequence, size, calculated_time, type, target, timestamp=None):
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.pcm = pcm
+        self.sequence = sequence
+        self.size = size
+        self.duration = float(size) / 2 / PYMUMBLE_SAMPLERATE
+        self.time = calculated_time
+        self.type = type
+        self.target = target
+
+
+class SoundQueue:
+    def __init__(self, mumble_object):
+        import opuslib
+
+        self.mumble_object = mumble_object
+        self.receive_sound = True
+        self.lock = threading.Lock()
+        self.decoders = {PYMUMBLE_AUDIO_TYPE_OPUS: opuslib.Decoder(PYMUMBLE_SAMPLERATE, 1)}
+
+    def add(self, audio, sequence, type, target):
+        if not self.receive_sound:
+            return None
+        with self.lock:
+            pcm = self.decoders[type].decode(audio, PYMUMBLE_READ_BUFFER_SIZE)
+        return SoundChunk(pcm, sequence, len(pcm), time.time(), type, target)
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    _module("pyaudio", paInt16=8, paContinue=0, paComplete=1)
+
+    pymumble = _module("pymumble_py3")
+    pymumble.constants = _module("pymumble_py3.constants",
+                                 PYMUMBLE_SAMPLERATE=PYMUMBLE_SAMPLERATE,
+                                 PYMUMBLE_SEQUENCE_DURATION=PYMUMBLE_SEQUENCE_DURATION,
+                                 PYMUMBLE_AUDIO_TYPE_OPUS=PYMUMBLE_AUDIO_TYPE_OPUS,
+                                 PYMUMBLE_READ_BUFFER_SIZE=PYMUMBLE_READ_BUFFER_SIZE)
+    pymumble.soundqueue = _module("pymumble_py3.soundqueue", SoundQueue=SoundQueue, SoundChunk=SoundChunk)
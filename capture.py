@@ -0,0 +1,80 @@
+import threading
+
+import pyaudio
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer/single-consumer byte ring. Each side only ever advances its own position, and
+    assigning an int is atomic under the GIL, so no lock is needed between the audio callback and the reader.
+    When the reader falls behind, new data is dropped and counted rather than overwriting unread audio.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.overruns = 0
+
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._write_pos = 0  # Total bytes ever written, owned by the producer
+        self._read_pos = 0  # Total bytes ever read, owned by the consumer
+
+    def available(self) -> int:
+        return self._write_pos - self._read_pos
+
+    def write(self, data) -> bool:
+        data = memoryview(data).cast("B")
+        size = len(data)
+        if size > self.capacity - self.available():
+            self.overruns += 1
+            return False
+
+        start = self._write_pos % self.capacity
+        first = min(size, self.capacity - start)
+        self._view[start:start + first] = data[:first]
+        self._view[:size - first] = data[first:]
+        self._write_pos += size  # Publish only once the bytes are in place
+        return True
+
+    def read(self, size: int) -> bytes:
+        size = min(size, self.available())
+        start = self._read_pos % self.capacity
+        first = min(size, self.capacity - start)
+        data = self._buffer[start:start + first]
+        if first < size:
+            data += self._view[:size - first]
+        self._read_pos += size
+        return bytes(data)
+
+
+class CaptureFramer(threading.Thread):
+    """
+    Callback-mode PyAudio capture. The stream callback only copies into the ring buffer; this thread sleeps until
+    a whole frame is available and hands exact frame_size frames to on_frame.
+    """
+
+    def __init__(self, on_frame, frame_size: int = 960, sample_width: int = 2, capacity_frames: int = 50):
+        super().__init__(daemon=True)
+        self.on_frame = on_frame
+        self.frame_bytes = frame_size * sample_width
+        self.ring = RingBuffer(self.frame_bytes * capacity_frames)
+
+        self._data_ready = threading.Event()
+        self._stopped = threading.Event()
+
+    def callback(self, in_data, frame_count, time_info, status):
+        self.ring.write(in_data)
+        if self.ring.available() >= self.frame_bytes:
+            self._data_ready.set()
+        return None, pyaudio.paContinue
+
+    def stop(self):
+        self._stopped.set()
+        self._data_ready.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._data_ready.wait()
+            self._data_ready.clear()
+            while self.ring.available() >= self.frame_bytes:
+                self.on_frame(self.ring.read(self.frame_bytes))
@@ -0,0 +1,75 @@
+import pymumble_py3
+from pymumble_py3.callbacks import PYMUMBLE_CLBK_CHANNELCREATED, PYMUMBLE_CLBK_CHANNELUPDATED, \
+    PYMUMBLE_CLBK_CHANNELREMOVED
+from pymumble_py3.errors import UnknownChannelError
+
+
+class ChannelIndex:
+    """
+    Name <-> id lookups for the server's channels, kept up to date from pymumble's channel callbacks so that
+    resolving a channel is a dict lookup instead of Channels.find_by_name's scan over every channel. Like
+    find_by_name, the first channel seen with a name wins and "" is the root channel.
+    """
+
+    def __init__(self):
+        self._ids_by_name: dict[str, int] = dict()
+        self._names_by_id: dict[int, str] = dict()
+        self.mumble: pymumble_py3.Mumble = None
+
+    def attach(self, mumble: pymumble_py3.Mumble):
+        """Registers the channel callbacks, call before mumble.start() to see every channel"""
+        self.mumble = mumble
+        self._ids_by_name.clear()
+        self._names_by_id.clear()
+        mumble.callbacks.add_callback(PYMUMBLE_CLBK_CHANNELCREATED, self._channel_created)
+        mumble.callbacks.add_callback(PYMUMBLE_CLBK_CHANNELUPDATED, self._channel_updated)
+        mumble.callbacks.add_callback(PYMUMBLE_CLBK_CHANNELREMOVED, self._channel_removed)
+        for channel in list(mumble.channels.values()):
+            self._add(channel["channel_id"], channel["name"])
+
+    def id_of(self, name: str) -> int:
+        if name == "":
+            return 0
+        try:
+            return self._ids_by_name[name]
+        except KeyError:
+            raise UnknownChannelError(f"Channel {name} does not exists")
+
+    def name_of(self, channel_id: int) -> str:
+        try:
+            return self._names_by_id[channel_id]
+        except KeyError:
+            raise UnknownChannelError(f"Channel {channel_id} does not exists")
+
+    def ids_of(self, names) -> list[int]:
+        return [self.id_of(name) for name in names]
+
+    def channel(self, name: str):
+        """The pymumble channel object, a drop in replacement for mumble.channels.find_by_name"""
+        return self.mumble.channels[self.id_of(name)]
+
+    def _add(self, channel_id: int, name: str):
+        self._names_by_id[channel_id] = name
+        self._ids_by_name.setdefault(name, channel_id)
+
+    def _remove(self, channel_id: int):
+        name = self._names_by_id.pop(channel_id, None)
+        if name is None or self._ids_by_name.get(name) != channel_id:
+            return
+        del self._ids_by_name[name]
+        # Fall back to another channel with the same name, if there is one
+        for other_id, other_name in list(self._names_by_id.items()):
+            if other_name == name:
+                self._ids_by_name[name] = other_id
+                break
+
+    def _channel_created(self, channel):
+        self._add(channel["channel_id"], channel["name"])
+
+    def _channel_updated(self, channel, actions: dict):
+        if "name" in actions:
+            self._remove(channel["channel_id"])
+            self._add(channel["channel_id"], channel["name"])
+
+    def _channel_removed(self, channel):
+        self._remove(channel["channel_id"])
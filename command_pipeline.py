@@ -0,0 +1,57 @@
+import threading
+
+
+class CommandPipeline(threading.Thread):
+    """
+    Runs client commands on a worker thread so that hotkey handlers only enqueue an intent and return. Only the
+    latest intent of each kind is kept, so pressing several channel keys in quick succession sends a single switch
+    to the last channel. on_done is called with the kind and the exception raised, or None, after every command.
+    """
+
+    def __init__(self, on_done=None):
+        super().__init__(daemon=True)
+        self.on_done = on_done
+
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+
+        self._pending: dict[str, tuple] = dict()
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def submit(self, kind: str, handler, *args):
+        with self._condition:
+            if self._pending.pop(kind, None) is not None:
+                self.coalesced += 1
+            self._pending[kind] = (handler, args)
+            self._condition.notify()
+
+    def pending(self, kind: str) -> bool:
+        return kind in self._pending
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopped)
+                if self._stopped:
+                    return
+                kind = next(iter(self._pending))
+                handler, args = self._pending.pop(kind)
+
+            error = None
+            try:
+                handler(*args)
+                self.completed += 1
+            except Exception as e:
+                # Keep the worker alive, a failed channel switch must not stop the following ones
+                error = e
+                self.failed += 1
+
+            if self.on_done is not None:
+                self.on_done(kind, error)
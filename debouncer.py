@@ -0,0 +1,66 @@
+import threading
+import time
+
+
+class Debouncer(threading.Thread):
+    """
+    Trailing edge debouncing of commands. A command is only dispatched once no other command of its kind has been
+    submitted for that kind's window, and then it is always the latest one, so mashing keys costs a single server
+    command and still ends up where the user last asked. Replaced commands are counted in suppressed.
+    """
+
+    def __init__(self, dispatch, windows: dict[str, float] = None, default_window: float = 0.15):
+        super().__init__(daemon=True)
+        self.dispatch = dispatch
+        self.windows = windows if windows is not None else dict()
+        self.default_window = default_window
+
+        self.suppressed = 0
+        self.suppressed_by_kind: dict[str, int] = dict()
+
+        self._pending: dict[str, tuple[float, tuple]] = dict()
+        # Taken out of _pending but not dispatched yet, still pending to the caller
+        self._dispatching: set[str] = set()
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def window(self, kind: str) -> float:
+        return self.windows.get(kind, self.default_window)
+
+    def submit(self, kind: str, *args):
+        with self._condition:
+            if kind in self._pending:
+                self.suppressed += 1
+                self.suppressed_by_kind[kind] = self.suppressed_by_kind.get(kind, 0) + 1
+            self._pending[kind] = (time.monotonic() + self.window(kind), args)
+            self._condition.notify()
+
+    def pending(self, kind: str) -> bool:
+        return kind in self._pending or kind in self._dispatching
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = time.monotonic()
+                    due = [kind for kind, (deadline, _) in self._pending.items() if deadline <= now]
+                    if due:
+                        break
+                    deadlines = [deadline for deadline, _ in self._pending.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+                if self._stopped:
+                    return
+                commands = [(kind, self._pending.pop(kind)[1]) for kind in due]
+                self._dispatching.update(due)
+
+            for kind, args in commands:
+                try:
+                    self.dispatch(kind, *args)
+                finally:
+                    with self._condition:
+                        self._dispatching.discard(kind)
@@ -0,0 +1,110 @@
+import collections
+import time
+
+
+class EncoderDecision:
+    def __init__(self, setting: str, old: int, new: int, reason: str, loss: float, rtt: float, cpu: float):
+        self.time = time.time()
+        self.setting = setting
+        self.old = old
+        self.new = new
+        self.reason = reason
+        self.loss = loss
+        self.rtt = rtt
+        self.cpu = cpu
+
+    def __repr__(self):
+        return (f"EncoderDecision({self.setting}: {self.old} -> {self.new}, {self.reason}, loss={self.loss:.1%}, "
+                f"rtt={self.rtt:.0f}ms, cpu={self.cpu:.0%})")
+
+
+class EncoderController:
+    """
+    Picks the outgoing encoder's bitrate, complexity, FEC and expected packet loss from link and CPU telemetry.
+    Bitrate and complexity back off as soon as a sample shows congestion or CPU overload, but only climb back after
+    recovery_ticks consecutive healthy samples, so the settings do not oscillate around the thresholds.
+    Every change is kept in history.
+    """
+
+    def __init__(self, min_bitrate: int = 12000, max_bitrate: int = 40000, bitrate_step: int = 4000,
+                 min_complexity: int = 3, max_complexity: int = 10, loss_threshold: float = 0.03,
+                 fec_threshold: float = 0.01, rtt_threshold: float = 250, cpu_threshold: float = 0.7,
+                 recovery_ticks: int = 5, dtx: bool = False, history_size: int = 500):
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self.bitrate_step = bitrate_step
+        self.min_complexity = min_complexity
+        self.max_complexity = max_complexity
+        self.loss_threshold = loss_threshold
+        self.fec_threshold = fec_threshold
+        self.rtt_threshold = rtt_threshold
+        self.cpu_threshold = cpu_threshold
+        self.recovery_ticks = recovery_ticks
+
+        self.settings = {
+            "bitrate": max_bitrate,
+            "complexity": max_complexity,
+            "inband_fec": 0,
+            "packet_loss_perc": 0,
+            "dtx": int(dtx),
+        }
+        self.history: collections.deque[EncoderDecision] = collections.deque(maxlen=history_size)
+        self.smoothed_loss = 0.0
+
+        self._healthy_ticks = 0
+
+    @classmethod
+    def from_config(cls, config: dict, dtx: bool = False) -> "EncoderController":
+        return cls(min_bitrate=config.get("MinBitrate", 12000),
+                   max_bitrate=config.get("MaxBitrate", 40000),
+                   min_complexity=config.get("MinComplexity", 3),
+                   max_complexity=config.get("MaxComplexity", 10),
+                   loss_threshold=config.get("LossThreshold", 0.03),
+                   rtt_threshold=config.get("RttThresholdMs", 250),
+                   cpu_threshold=config.get("CpuThreshold", 0.7),
+                   recovery_ticks=config.get("RecoveryTicks", 5),
+                   dtx=config.get("Dtx", dtx))
+
+    def update(self, loss: float, rtt: float, cpu: float) -> dict[str, int]:
+        """
+        Takes one telemetry sample (loss fraction, round trip time in ms, CPU fraction of one core) and returns the
+        encoder settings to apply.
+        """
+        new_settings = dict(self.settings)
+        reasons = dict()
+        # libopus rejects a packet_loss_perc outside 0..100
+        loss = min(max(loss, 0.0), 1.0)
+
+        # Loss is followed up at once but forgotten slowly, so that FEC is not toggled by every quiet second
+        if loss > self.smoothed_loss:
+            self.smoothed_loss = loss
+        else:
+            self.smoothed_loss += (loss - self.smoothed_loss) * 0.2
+        new_settings["packet_loss_perc"] = min(100, round(self.smoothed_loss * 100))
+        new_settings["inband_fec"] = int(self.smoothed_loss >= self.fec_threshold)
+        reasons["packet_loss_perc"] = reasons["inband_fec"] = "measured loss"
+
+        congested = loss > self.loss_threshold or rtt > self.rtt_threshold
+        overloaded = cpu > self.cpu_threshold
+        if congested or overloaded:
+            self._healthy_ticks = 0
+            if congested:
+                new_settings["bitrate"] = max(self.min_bitrate, int(self.settings["bitrate"] * 0.75))
+                reasons["bitrate"] = "congestion"
+            if overloaded:
+                new_settings["complexity"] = max(self.min_complexity, self.settings["complexity"] - 2)
+                reasons["complexity"] = "cpu overload"
+        else:
+            self._healthy_ticks += 1
+            if self._healthy_ticks >= self.recovery_ticks:
+                self._healthy_ticks = 0
+                new_settings["bitrate"] = min(self.max_bitrate, self.settings["bitrate"] + self.bitrate_step)
+                new_settings["complexity"] = min(self.max_complexity, self.settings["complexity"] + 1)
+                reasons["bitrate"] = reasons["complexity"] = "recovery"
+
+        for setting, value in new_settings.items():
+            if value != self.settings[setting]:
+                self.history.append(EncoderDecision(setting, self.settings[setting], value, reasons[setting],
+                                                    loss, rtt, cpu))
+        self.settings = new_settings
+        return new_settings
@@ -0,0 +1,130 @@
+import audioop
+import collections
+import heapq
+import threading
+import time
+
+from pymumble_py3.constants import PYMUMBLE_SAMPLERATE, PYMUMBLE_SEQUENCE_DURATION
+
+from vad import comfort_noise
+
+BYTES_PER_SECOND = PYMUMBLE_SAMPLERATE * 2  # 16 bit mono
+BYTES_PER_SEQUENCE = int(BYTES_PER_SECOND * PYMUMBLE_SEQUENCE_DURATION)
+SAMPLE_WIDTH = 2  # pymumble soundchunk.pcm is 16 bits
+
+
+class JitterBuffer:
+    """
+    Reorders one speaker's sound chunks by sequence number and holds back playout by a target delay that follows
+    the measured inter-arrival jitter (RFC 3550 estimator), bounded by min_delay and the max_delay latency ceiling.
+    push is called from the network thread and pop from the output stream's callback.
+    Senders stop transmitting during silence, so the quietest of the last noise_window chunks is kept as the
+    speaker's background level, and comfort_noise plays it for comfort_noise_time after the stream runs dry.
+    """
+
+    def __init__(self, min_delay: float = 0.02, max_delay: float = 0.2, jitter_factor: float = 3.0,
+                 comfort_noise_time: float = 2.0, noise_window: int = 25):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter_factor = jitter_factor
+        self.comfort_noise_time = comfort_noise_time
+
+        self.target_delay = min_delay
+        self.jitter = 0.0
+
+        self.late = 0  # Arrived after their slot had already been played
+        self.dropped = 0  # Discarded to shrink the delay or to stay under the latency ceiling
+        self.underruns = 0
+        self.noise_rms = 0  # Background level of the speaker
+
+        self._lock = threading.Lock()
+        self._chunks: list[tuple[int, bytes]] = []  # Heap ordered by sequence
+        self._buffered_bytes = 0
+        self._head = b""  # Remainder of a partially played chunk
+        self._next_sequence: int = None
+        self._last_transit: float = None
+        self._playing = False
+        self._recent_rms: collections.deque[int] = collections.deque(maxlen=noise_window)
+        self._comfort_noise_until = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return not self._playing and not self._chunks and not self._head
+
+    @property
+    def delay(self) -> float:
+        return (self._buffered_bytes + len(self._head)) / BYTES_PER_SECOND
+
+    def push(self, sequence: int, pcm: bytes, arrival_time: float = None):
+        if arrival_time is None:
+            arrival_time = time.monotonic()
+
+        with self._lock:
+            if self._next_sequence is not None and sequence < self._next_sequence:
+                if not self.idle:
+                    self.late += 1
+                    return
+                # The speaker started a new talk burst, which restarts the sequence numbers
+                self._next_sequence = None
+                self._last_transit = None
+
+            self._update_target_delay(sequence, arrival_time)
+
+            self._recent_rms.append(audioop.rms(pcm, SAMPLE_WIDTH))
+            heapq.heappush(self._chunks, (sequence, pcm))
+            self._buffered_bytes += len(pcm)
+
+            while self._buffered_bytes > self.max_delay * BYTES_PER_SECOND and len(self._chunks) > 1:
+                self._drop_oldest()
+
+    def pop(self, nbytes: int) -> bytes:
+        """Returns exactly nbytes of PCM, or None while buffering or after an underrun."""
+        with self._lock:
+            buffered = self._buffered_bytes + len(self._head)
+            if not self._playing:
+                if buffered == 0 or buffered < self.target_delay * BYTES_PER_SECOND:
+                    return None
+                self._playing = True
+            elif buffered == 0:
+                self._playing = False
+                self.underruns += 1
+                self.noise_rms = min(self._recent_rms, default=0)
+                self._comfort_noise_until = time.monotonic() + self.comfort_noise_time
+                return None
+
+            # Shrink gradually, one chunk per pop, once well above the target
+            if buffered - nbytes > 2 * self.target_delay * BYTES_PER_SECOND and len(self._chunks) > 1:
+                self._drop_oldest()
+
+            pcm = self._head
+            while len(pcm) < nbytes and self._chunks:
+                sequence, chunk = heapq.heappop(self._chunks)
+                self._buffered_bytes -= len(chunk)
+                self._next_sequence = sequence + max(1, len(chunk) // BYTES_PER_SEQUENCE)
+                pcm += chunk
+
+            self._head = pcm[nbytes:]
+            if len(pcm) < nbytes:
+                return pcm + bytes(nbytes - len(pcm))
+            return pcm[:nbytes]
+
+    def comfort_noise(self, nbytes: int) -> bytes:
+        """Noise at the speaker's background level to play instead of pop's None, or None once it has run out"""
+        if self.noise_rms == 0 or time.monotonic() > self._comfort_noise_until:
+            return None
+        return comfort_noise(nbytes, self.noise_rms)
+
+    def _update_target_delay(self, sequence: int, arrival_time: float):
+        transit = arrival_time - sequence * PYMUMBLE_SEQUENCE_DURATION
+        if self._last_transit is not None:
+            self.jitter += (abs(transit - self._last_transit) - self.jitter) / 16
+        self._last_transit = transit
+
+        self.target_delay = min(self.max_delay, self.min_delay + self.jitter_factor * self.jitter)
+
+    def _drop_oldest(self):
+        sequence, chunk = heapq.heappop(self._chunks)
+        self._buffered_bytes -= len(chunk)
+        self._next_sequence = sequence + max(1, len(chunk) // BYTES_PER_SEQUENCE)
+        self.dropped += 1
+
@@ -0,0 +1,43 @@
+class ListeningSet:
+    """
+    Diff engine for the channels we listen to. confirmed is the set of channel ids the server has reported for our
+    own user, and update computes the single add/remove pair that turns it into the desired set, so a change sends
+    at most one ModUserState and none when nothing changed.
+    """
+
+    def __init__(self):
+        self.confirmed: set[int] = set()
+
+        self.sent_updates = 0
+        self.skipped_updates = 0
+
+    def user_updated(self, user):
+        """Call from pymumble's user updated callback for our own user"""
+        # pymumble keeps the last value of every field and only reports fields whose value changed, so take the
+        # listening deltas out of the user to see the next identical delta as well
+        added = user.pop("listening_channel_add", None)
+        removed = user.pop("listening_channel_remove", None)
+        if added:
+            self.confirmed.update(added)
+        if removed:
+            self.confirmed.difference_update(removed)
+
+    def update(self, desired: set[int]) -> dict[str, list[int]]:
+        """The ModUserState parameters that take the server from confirmed to desired, empty if it is already there"""
+        add = sorted(desired - self.confirmed)
+        remove = sorted(self.confirmed - desired)
+        if not add and not remove:
+            self.skipped_updates += 1
+            return dict()
+
+        self.sent_updates += 1
+        parameters = dict()
+        if add:
+            parameters["listening_channel_add"] = add
+        if remove:
+            parameters["listening_channel_remove"] = remove
+        return parameters
+
+    def reset(self):
+        """Forget the confirmed set, the server does not keep it across connections"""
+        self.confirmed.clear()
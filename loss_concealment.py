@@ -0,0 +1,99 @@
+import pymumble_py3.soundqueue
+from pymumble_py3.constants import PYMUMBLE_AUDIO_TYPE_OPUS, PYMUMBLE_SAMPLERATE, PYMUMBLE_SEQUENCE_DURATION
+
+import opuslib
+
+SAMPLES_PER_SEQUENCE = int(PYMUMBLE_SAMPLERATE * PYMUMBLE_SEQUENCE_DURATION)
+
+# Gaps longer than this (in sequence units, 10ms each) are a new talk burst rather than lost packets
+MAX_CONCEALED_SEQUENCES = 10
+
+
+class LossStats:
+    def __init__(self):
+        self.received = 0
+        self.lost = 0
+        self.recovered = 0  # Rebuilt from the in-band FEC data of the following packet, if it carried any
+        self.concealed = 0  # Synthesised by the decoder's packet loss concealment
+
+    def __repr__(self):
+        return (f"LossStats(received={self.received}, lost={self.lost}, recovered={self.recovered}, "
+                f"concealed={self.concealed})")
+
+
+class ConcealingSoundQueue(pymumble_py3.soundqueue.SoundQueue):
+    """
+    Per user sound queue that fills sequence gaps before handing the audio on, so that playout stays continuous.
+    The packet after a gap is first asked for its FEC copy of the previous frame, and anything further back is
+    concealed by the decoder.
+    """
+
+    def __init__(self, mumble_object, max_concealed_sequences: int = MAX_CONCEALED_SEQUENCES):
+        super().__init__(mumble_object)
+        self.max_concealed_sequences = max_concealed_sequences
+        self.stats = LossStats()
+        self._expected_sequence: int = None
+
+    def rebind(self, mumble_object):
+        """Reuses this queue and its decoders for a new connection, dropping everything left from the old one"""
+        with self.lock:
+            self.mumble_object = mumble_object
+            self.queue.clear()
+            self.start_sequence = None
+            self.start_time = None
+            self._expected_sequence = None
+            for decoder in self.decoders.values():
+                decoder.reset_state()
+
+    def add(self, audio, sequence, type, target):
+        if not self.receive_sound:
+            return None
+
+        first_sequence = sequence
+        concealed = b""
+        if type == PYMUMBLE_AUDIO_TYPE_OPUS and audio:
+            first_sequence, concealed = self._conceal_gap(audio, sequence)
+
+        newsound = super().add(audio, sequence, type, target)
+        if newsound is not None and concealed:
+            newsound.pcm = concealed + newsound.pcm
+            newsound.size = len(newsound.pcm)
+            newsound.duration = float(newsound.size) / 2 / PYMUMBLE_SAMPLERATE
+            newsound.time -= (sequence - first_sequence) * PYMUMBLE_SEQUENCE_DURATION
+            newsound.sequence = first_sequence
+        return newsound
+
+    def _conceal_gap(self, audio: bytes, sequence: int) -> tuple[int, bytes]:
+        try:
+            packet = opuslib.parse_packet(audio)
+            has_fec = opuslib.packet_has_lbrr(audio)
+        except opuslib.OpusError:
+            return sequence, b""
+
+        packet_sequences = max(1, packet.nb_samples // SAMPLES_PER_SEQUENCE)
+        expected_sequence = self._expected_sequence
+        self._expected_sequence = sequence + packet_sequences
+        self.stats.received += 1
+
+        if expected_sequence is None:
+            return sequence, b""
+        gap = sequence - expected_sequence
+        if gap <= 0 or gap > self.max_concealed_sequences:
+            return sequence, b""
+
+        lost_packets = max(1, gap // packet_sequences)
+        self.stats.lost += lost_packets
+        # libopus runs PLC over everything but the last frame, then completes with FEC if the sender encoded it
+        if has_fec:
+            self.stats.recovered += 1
+            self.stats.concealed += lost_packets - 1
+        else:
+            self.stats.concealed += lost_packets
+
+        with self.lock:
+            try:
+                pcm = self.decoders[PYMUMBLE_AUDIO_TYPE_OPUS].decode(audio, gap * SAMPLES_PER_SEQUENCE,
+                                                                     decode_fec=True)
+            except opuslib.OpusError:
+                return sequence, b""
+        return expected_sequence, pcm
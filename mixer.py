@@ -0,0 +1,82 @@
+import audioop
+import threading
+import time
+
+import pyaudio
+
+from jitter_buffer import JitterBuffer
+
+SAMPLE_WIDTH = 2  # pymumble soundchunk.pcm is 16 bits
+
+
+class Mixer:
+    """
+    Sums the jitter buffers of every active speaker into a single output. mix is driven by the output stream's
+    callback, which makes the sound card the playout clock. A source that has run dry plays its comfort noise,
+    which does not count as activity, and sources that stay idle for idle_timeout are removed.
+    """
+
+    def __init__(self, source_factory, idle_timeout: float = 5.0):
+        self.source_factory = source_factory
+        self.idle_timeout = idle_timeout
+
+        self.sources: dict[int, JitterBuffer] = dict()
+        self.gains: dict[int, float] = dict()
+        self.removed_sources = 0
+
+        self._last_active: dict[int, float] = dict()
+        self._silence = b""
+        # Held while a source is looked up and pushed into, and while it is removed, so that a source is never
+        # removed between the two and takes the first chunk after an idle gap with it
+        self._sources_lock = threading.Lock()
+
+    def push(self, session: int, sequence: int, pcm: bytes):
+        with self._sources_lock:
+            try:
+                source = self.sources[session]
+            except KeyError:
+                source = self.sources[session] = self.source_factory()
+                self._last_active[session] = time.monotonic()
+            source.push(sequence, pcm)
+
+    def set_gain(self, session: int, gain: float):
+        self.gains[session] = gain
+
+    def mix(self, nbytes: int) -> bytes:
+        now = time.monotonic()
+        mixed = None
+        for session, source in list(self.sources.items()):
+            pcm = source.pop(nbytes)
+            if pcm is not None:
+                self._last_active[session] = now
+            else:
+                if source.idle and now - self._last_active.get(session, now) > self.idle_timeout:
+                    self._remove_idle_source(session, source)
+                    continue
+                pcm = source.comfort_noise(nbytes)
+                if pcm is None:
+                    continue
+
+            gain = self.gains.get(session, 1.0)
+            if gain != 1.0:
+                pcm = audioop.mul(pcm, SAMPLE_WIDTH, gain)
+            # audioop saturates instead of wrapping around on overflow
+            mixed = pcm if mixed is None else audioop.add(mixed, pcm, SAMPLE_WIDTH)
+
+        if mixed is None:
+            if len(self._silence) != nbytes:
+                self._silence = bytes(nbytes)
+            return self._silence
+        return mixed
+
+    def callback(self, in_data, frame_count, time_info, status):
+        return self.mix(frame_count * SAMPLE_WIDTH), pyaudio.paContinue
+
+    def _remove_idle_source(self, session: int, source: JitterBuffer):
+        with self._sources_lock:
+            # A push may have landed since the idle check
+            if not source.idle or self.sources.get(session) is not source:
+                return
+            del self.sources[session]
+            self._last_active.pop(session, None)
+            self.removed_sources += 1
@@ -0,0 +1,97 @@
+import logging
+
+import pymumble_py3
+from pymumble_py3 import mumble_pb2
+from pymumble_py3.constants import PYMUMBLE_MSG_TYPES_USERSTATE, PYMUMBLE_MSG_TYPES_VOICETARGET
+from pymumble_py3.messages import Cmd
+
+CMD_CHANNEL_VOICE_TARGET = "channel_voice_target"
+CMD_USER_STATE = "user_state"
+CMD_CONFIGURE_ENCODER = "configure_encoder"
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelVoiceTarget(Cmd):
+    """
+    Command to register a voice target that whispers to a channel. pymumble's own VoiceTarget command only supports
+    channels for target id 1.
+    """
+
+    def __init__(self, target_id: int, channel_id: int):
+        Cmd.__init__(self)
+
+        self.cmd = CMD_CHANNEL_VOICE_TARGET
+        self.parameters = {"id": target_id,
+                           "channel_id": channel_id}
+
+
+class UserState(Cmd):
+    """
+    Command to send any set of UserState fields in a single message, e.g. a channel move together with the mute
+    state and listening changes, which pymumble's MoveCmd and ModUserState can only send separately
+    """
+
+    def __init__(self, session: int, parameters: dict):
+        Cmd.__init__(self)
+
+        self.cmd = CMD_USER_STATE
+        self.parameters = {"session": session, **parameters}
+
+
+class ConfigureEncoder(Cmd):
+    """
+    Command to apply Encoder.configure settings to pymumble's encoder. pymumble encodes on its own thread and
+    libopus calls release the GIL, so the encoder may only be touched from that thread.
+    """
+
+    def __init__(self, settings: dict):
+        Cmd.__init__(self)
+
+        self.cmd = CMD_CONFIGURE_ENCODER
+        self.parameters = settings
+
+
+class Mumble(pymumble_py3.Mumble):
+    """
+    pymumble's Mumble, able to send the commands above from its own thread like every other command. It also keeps
+    the server's last reported counts of our audio packets (good, late, lost) in server_packet_stats.
+    """
+
+    server_packet_stats: tuple[int, int, int] = (0, 0, 0)
+
+    def ping_response(self, mess):
+        super().ping_response(mess)
+        self.server_packet_stats = (mess.good, mess.late, mess.lost)
+
+    def treat_command(self, cmd):
+        if cmd.cmd == CMD_CHANNEL_VOICE_TARGET:
+            voice_target = mumble_pb2.VoiceTarget()
+            voice_target.id = cmd.parameters["id"]
+            target = mumble_pb2.VoiceTarget.Target()
+            target.channel_id = cmd.parameters["channel_id"]
+            voice_target.targets.append(target)
+            self.send_message(PYMUMBLE_MSG_TYPES_VOICETARGET, voice_target)
+        elif cmd.cmd == CMD_USER_STATE:
+            user_state = mumble_pb2.UserState()
+            for field, value in cmd.parameters.items():
+                if isinstance(value, list):
+                    getattr(user_state, field).extend(value)
+                else:
+                    setattr(user_state, field, value)
+            self.send_message(PYMUMBLE_MSG_TYPES_USERSTATE, user_state)
+        elif cmd.cmd == CMD_CONFIGURE_ENCODER:
+            encoder = self.sound_output.encoder
+            if encoder is not None:
+                try:
+                    # pymumble recreates its encoder when the codec changes, so (re)enable caching every time
+                    encoder.cached = True
+                    encoder.configure(**cmd.parameters)
+                except Exception:
+                    # Never let a bad setting take the connection thread down
+                    logger.exception("Could not configure the encoder")
+        else:
+            return super().treat_command(cmd)
+
+        cmd.response = True
+        self.commands.answer(cmd)
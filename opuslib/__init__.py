@@ -24,6 +24,12 @@ from .constants import OK, APPLICATION_TYPES_MAP  # NOQA
 
 from .classes import Encoder, Decoder  # NOQA
 
+from .classes import MultiStreamEncoder, MultiStreamDecoder  # NOQA
+
+from .classes import Repacketizer  # NOQA
+
+from .packet import PacketInfo, packet_has_lbrr, parse_packet, parse_packets  # NOQA
+
 __author__ = 'Никита Кузнецов <self@svartalf.info>'
 __copyright__ = 'Copyright (c) 2012, SvartalF'
 __license__ = 'BSD 3-Clause License'
@@ -6,6 +6,8 @@
 """OpusLib Package."""
 
 import ctypes  # type: ignore
+import os
+import sys
 
 from ctypes.util import find_library  # type: ignore
 
@@ -14,15 +16,145 @@ __copyright__ = 'Copyright (c) 2012, SvartalF'
 __license__ = 'BSD 3-Clause License'
 
 
-# lib_location = find_library('opus')
+# Environment variable overriding the location of the Opus library
+LIBRARY_PATH_VARIABLE = 'OPUS_LIBRARY_PATH'
 
-# if lib_location is None:
-#     raise Exception(
-#         'Could not find Opus library. Make sure it is installed.')
+if sys.platform == 'win32':
+    _BUNDLED_NAMES = ('opus.dll', 'libopus-0.dll')
+elif sys.platform == 'darwin':
+    _BUNDLED_NAMES = ('libopus.0.dylib', 'libopus.dylib')
+else:
+    _BUNDLED_NAMES = ('libopus.so.0', 'libopus.so')
 
-# libopus = ctypes.CDLL(lib_location)
-libopus = ctypes.windll.LoadLibrary("./opus.dll")
+
+def _bundled_paths():
+    """Library files shipped next to the program or inside this package."""
+    directories = [os.getcwd(), os.path.dirname(os.path.abspath(__file__))]
+    if hasattr(sys, '_MEIPASS'):
+        # PyInstaller one-file bundles unpack their binaries here
+        directories.insert(0, sys._MEIPASS)  # pylint: disable=protected-access
+    for directory in directories:
+        for name in _BUNDLED_NAMES:
+            yield os.path.join(directory, name)
+
+
+def find_libopus():
+    """
+    Resolves the Opus library: `OPUS_LIBRARY_PATH` first, then a bundled
+    copy, then the system library search path.
+    """
+    lib_location = os.environ.get(LIBRARY_PATH_VARIABLE)
+    if lib_location:
+        return lib_location
+
+    for path in _bundled_paths():
+        if os.path.isfile(path):
+            return path
+
+    return find_library('opus')
+
+
+def load_libopus():
+    """Loads the Opus shared library."""
+    lib_location = find_libopus()
+
+    if lib_location is None:
+        raise Exception(
+            'Could not find Opus library. Make sure it is installed, or '
+            'point {} at it.'.format(LIBRARY_PATH_VARIABLE))
+
+    if sys.platform == 'win32':
+        return ctypes.WinDLL(lib_location)
+    return ctypes.CDLL(lib_location)
+
+
+class LazyFunction(object):
+
+    """
+    A libopus function that is only looked up and bound on its first call.
+
+    `argtypes` and `restype` may be set right away, as on a ctypes function,
+    and are applied when binding.
+    """
+
+    def __init__(self, library: 'LazyLibrary', name: str) -> None:
+        self._library = library
+        self._name = name
+        self._function = None
+        self.argtypes = None
+        self.restype = ctypes.c_int
+
+    def __repr__(self) -> str:
+        return '<{} {}>'.format(type(self).__name__, self._name)
+
+    def __call__(self, *args):
+        function = self._function
+        if function is None:
+            function = self._bind()
+        return function(*args)
+
+    def _bind(self):
+        function = getattr(self._library.load(), self._name)
+        if self.argtypes is not None:
+            function.argtypes = self.argtypes
+        function.restype = self.restype
+        self._function = function
+        return function
+
+
+class LazyLibrary(object):
+
+    """
+    Stands in for the libopus `CDLL`, deferring the library load until the
+    first libopus function is called.
+    """
+
+    def __init__(self) -> None:
+        self._library = None
+
+    def load(self):
+        """Loads the library, once."""
+        if self._library is None:
+            self._library = load_libopus()
+        return self._library
+
+    def __getattr__(self, name: str) -> LazyFunction:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        function = LazyFunction(self, name)
+        setattr(self, name, function)
+        return function
+
+
+libopus = LazyLibrary()
 
 c_int_pointer = ctypes.POINTER(ctypes.c_int)
 c_int16_pointer = ctypes.POINTER(ctypes.c_int16)
 c_float_pointer = ctypes.POINTER(ctypes.c_float)
+
+
+def buffer_array(buffer, c_type, count: int):
+    """
+    Wraps a writable buffer-protocol object (bytearray, memoryview, numpy
+    array...) as a ctypes array of `count` `c_type` items, without copying.
+
+    Raises `TypeError` for read-only buffers and `ValueError` when the
+    buffer is too small.
+    """
+    return (c_type * count).from_buffer(buffer)
+
+
+def buffer_pointer(buffer, c_pointer_type):
+    """
+    Gets a `c_pointer_type` pointer to the start of a buffer-protocol object.
+
+    `bytes` and writable buffers are shared without copying, any other
+    read-only buffer is copied once. The returned pointer keeps the
+    underlying object alive.
+    """
+    if isinstance(buffer, bytes):
+        return ctypes.cast(buffer, c_pointer_type)
+    try:
+        return ctypes.pointer(c_pointer_type._type_.from_buffer(buffer))
+    except TypeError:
+        return ctypes.cast(bytes(buffer), c_pointer_type)
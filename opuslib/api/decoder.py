@@ -152,7 +152,8 @@ def packet_get_samples_per_frame(
     """Gets the number of samples per frame from an Opus packet"""
     data_pointer = ctypes.c_char_p(data)
 
-    result = libopus_packet_get_nb_frames(data_pointer, ctypes.c_int(fs))
+    result = libopus_packet_get_samples_per_frame(
+        data_pointer, ctypes.c_int(fs))
 
     if result < 0:
         raise opuslib.exceptions.OpusError(result)
@@ -229,15 +230,13 @@ def decode(  # pylint: disable=too-many-arguments
     _decode_fec = int(decode_fec)
     result: int = 0
 
-    pcm_size = frame_size * channels * ctypes.sizeof(ctypes.c_int16)
-    pcm = (ctypes.c_int16 * pcm_size)()
-    pcm_pointer = ctypes.cast(pcm, opuslib.api.c_int16_pointer)
+    pcm = (ctypes.c_int16 * (frame_size * channels))()
 
     result = libopus_decode(
         decoder_state,
         opus_data,
         length,
-        pcm_pointer,
+        pcm,
         frame_size,
         _decode_fec
     )
@@ -245,7 +244,47 @@ def decode(  # pylint: disable=too-many-arguments
     if result < 0:
         raise opuslib.exceptions.OpusError(result)
 
-    return array.array('h', pcm_pointer[:result * channels]).tobytes()
+    return ctypes.string_at(
+        pcm, result * channels * ctypes.sizeof(ctypes.c_int16))
+
+
+def decode_into(  # pylint: disable=too-many-arguments
+        decoder_state: ctypes.Structure,
+        opus_data: typing.Optional[bytes],
+        out_buffer: typing.Any,
+        frame_size: int,
+        decode_fec: bool,
+        channels: int = 2
+) -> int:
+    """
+    Decode an Opus Frame to PCM, writing straight into `out_buffer`.
+
+    `out_buffer` may be any writable buffer-protocol object (bytearray,
+    memoryview, numpy array...) with room for at least
+    `frame_size * channels` 16-bit samples. Nothing is allocated or copied
+    on the Python side.
+
+    Passing `None` as `opus_data` makes the decoder produce a packet loss
+    concealment frame of `frame_size` samples.
+
+    Returns the number of decoded samples per channel.
+    """
+    pcm = opuslib.api.buffer_array(
+        out_buffer, ctypes.c_int16, frame_size * channels)
+
+    result = libopus_decode(
+        decoder_state,
+        opus_data,
+        len(opus_data) if opus_data is not None else 0,
+        pcm,
+        frame_size,
+        int(decode_fec)
+    )
+
+    if result < 0:
+        raise opuslib.exceptions.OpusError(result)
+
+    return result
 
 
 libopus_decode_float = opuslib.api.libopus.opus_decode_float
@@ -7,7 +7,6 @@
 CTypes mapping between libopus functions and Python.
 """
 
-import array
 import ctypes  # type: ignore
 import typing
 
@@ -63,7 +62,7 @@ def create_state(fs: int, channels: int, application: int) -> ctypes.Structure:
         ctypes.byref(result_code)
     )
 
-    if result_code.value is not opuslib.OK:
+    if result_code.value != opuslib.OK:
         raise opuslib.OpusError(result_code.value)
 
     return result
@@ -139,7 +138,41 @@ def encode(
         raise opuslib.OpusError(
             'Opus Encoder returned result="{}"'.format(result))
 
-    return array.array('b', opus_data[:result]).tobytes()
+    return ctypes.string_at(opus_data, result)
+
+
+def encode_into(
+        encoder_state: ctypes.Structure,
+        pcm_data: typing.Any,
+        frame_size: int,
+        out_buffer: typing.Any,
+        max_data_bytes: typing.Optional[int] = None
+) -> memoryview:
+    """
+    Encodes an Opus Frame into a preallocated output buffer.
+
+    `pcm_data` may be any buffer-protocol object holding 16-bit samples and
+    is passed to libopus without a copy. `out_buffer` must be a writable
+    byte buffer; `max_data_bytes` defaults to its whole length.
+
+    Returns a memoryview of `out_buffer` covering the written payload.
+    """
+    if max_data_bytes is None:
+        max_data_bytes = len(out_buffer)
+
+    result = libopus_encode(
+        encoder_state,
+        opuslib.api.buffer_pointer(pcm_data, opuslib.api.c_int16_pointer),
+        frame_size,
+        opuslib.api.buffer_array(out_buffer, ctypes.c_char, max_data_bytes),
+        max_data_bytes
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(
+            'Opus Encoder returned result="{}"'.format(result))
+
+    return memoryview(out_buffer)[:result]
 
 
 libopus_encode_float = opuslib.api.libopus.opus_encode_float
@@ -176,7 +209,36 @@ def encode_float(
         raise opuslib.OpusError(
             'Encoder returned result="{}"'.format(result))
 
-    return array.array('b', opus_data[:result]).tobytes()
+    return ctypes.string_at(opus_data, result)
+
+
+def encode_float_into(
+        encoder_state: ctypes.Structure,
+        pcm_data: typing.Any,
+        frame_size: int,
+        out_buffer: typing.Any,
+        max_data_bytes: typing.Optional[int] = None
+) -> memoryview:
+    """
+    Encodes an Opus frame from floating point input into a preallocated
+    output buffer. See `encode_into`.
+    """
+    if max_data_bytes is None:
+        max_data_bytes = len(out_buffer)
+
+    result = libopus_encode_float(
+        encoder_state,
+        opuslib.api.buffer_pointer(pcm_data, opuslib.api.c_float_pointer),
+        frame_size,
+        opuslib.api.buffer_array(out_buffer, ctypes.c_char, max_data_bytes),
+        max_data_bytes
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(
+            'Encoder returned result="{}"'.format(result))
+
+    return memoryview(out_buffer)[:result]
 
 
 destroy = opuslib.api.libopus.opus_encoder_destroy
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name
+#
+
+"""
+CTypes mapping between libopus multistream functions and Python.
+
+A multistream encoder/decoder codes several elementary Opus streams, each
+mono or coupled stereo, in a single call. `mapping` assigns every output
+channel to a decoded stream channel, as described in `opus_multistream.h`.
+"""
+
+import ctypes  # type: ignore
+import typing
+
+import opuslib
+import opuslib.api
+
+__author__ = 'Никита Кузнецов <self@svartalf.info>'
+__copyright__ = 'Copyright (c) 2012, SvartalF'
+__license__ = 'BSD 3-Clause License'
+
+
+class MultiStreamEncoder(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """Opus multistream encoder state."""
+    pass
+
+
+class MultiStreamDecoder(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """Opus multistream decoder state."""
+    pass
+
+
+MultiStreamEncoderPointer = ctypes.POINTER(MultiStreamEncoder)
+MultiStreamDecoderPointer = ctypes.POINTER(MultiStreamDecoder)
+
+
+def _mapping_bytes(
+        mapping: typing.Sequence[int],
+        channels: int,
+        streams: int,
+        coupled_streams: int
+) -> bytes:
+    """
+    Checks `mapping` before libopus reads `channels` bytes of it, so that a
+    short mapping can not make it read past the end of the buffer.
+    """
+    # 255 marks a channel that is silent (decoder) or ignored (encoder)
+    decoded_channels = streams + coupled_streams
+    if len(mapping) != channels or any(
+            not (0 <= entry < decoded_channels or entry == 255)
+            for entry in mapping):
+        raise opuslib.OpusError(opuslib.BAD_ARG)
+    return bytes(mapping)
+
+
+#
+# Encoder
+#
+
+libopus_encoder_get_size = \
+    opuslib.api.libopus.opus_multistream_encoder_get_size
+libopus_encoder_get_size.argtypes = (ctypes.c_int, ctypes.c_int)
+libopus_encoder_get_size.restype = ctypes.c_int32
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def get_encoder_size(
+        streams: int,
+        coupled_streams: int
+) -> typing.Union[int, typing.Any]:
+    """Gets the size of an OpusMSEncoder structure."""
+    return libopus_encoder_get_size(streams, coupled_streams)
+
+
+libopus_encoder_create = opuslib.api.libopus.opus_multistream_encoder_create
+libopus_encoder_create.argtypes = (
+    ctypes.c_int32,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_int,
+    opuslib.api.c_int_pointer
+)
+libopus_encoder_create.restype = MultiStreamEncoderPointer
+
+
+def create_encoder_state(  # pylint: disable=too-many-arguments
+        fs: int,
+        channels: int,
+        streams: int,
+        coupled_streams: int,
+        mapping: typing.Sequence[int],
+        application: int
+) -> ctypes.Structure:
+    """
+    Allocates and initializes a multistream encoder state.
+
+    :param fs: Sample rate of the input signal (Hz).
+    :param channels: Number of interleaved input channels.
+    :param streams: Total number of streams to encode.
+    :param coupled_streams: How many of `streams` are coupled (stereo).
+    :param mapping: Stream channel for each input channel.
+    :param application: One of the `APPLICATION_*` constants.
+    """
+    result_code = ctypes.c_int()
+
+    result = libopus_encoder_create(
+        fs,
+        channels,
+        streams,
+        coupled_streams,
+        _mapping_bytes(mapping, channels, streams, coupled_streams),
+        application,
+        ctypes.byref(result_code)
+    )
+
+    if result_code.value != opuslib.OK:
+        raise opuslib.OpusError(result_code.value)
+
+    return result
+
+
+libopus_encoder_ctl = opuslib.api.libopus.opus_multistream_encoder_ctl
+libopus_encoder_ctl.restype = ctypes.c_int
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def encoder_ctl(
+        encoder_state: ctypes.Structure,
+        request,
+        value=None
+) -> typing.Union[int, typing.Any]:
+    if value is not None:
+        return request(libopus_encoder_ctl, encoder_state, value)
+    return request(libopus_encoder_ctl, encoder_state)
+
+
+libopus_encode = opuslib.api.libopus.opus_multistream_encode
+libopus_encode.argtypes = (
+    MultiStreamEncoderPointer,
+    opuslib.api.c_int16_pointer,
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_int32
+)
+libopus_encode.restype = ctypes.c_int
+
+
+def encode_into(
+        encoder_state: ctypes.Structure,
+        pcm_data: typing.Any,
+        frame_size: int,
+        out_buffer: typing.Any,
+        max_data_bytes: typing.Optional[int] = None
+) -> memoryview:
+    """
+    Encodes one frame of every stream into a preallocated output buffer.
+
+    `pcm_data` holds `frame_size` interleaved 16-bit samples per channel.
+    Returns a memoryview of `out_buffer` covering the written packet.
+    """
+    if max_data_bytes is None:
+        max_data_bytes = len(out_buffer)
+
+    result = libopus_encode(
+        encoder_state,
+        opuslib.api.buffer_pointer(pcm_data, opuslib.api.c_int16_pointer),
+        frame_size,
+        opuslib.api.buffer_array(out_buffer, ctypes.c_char, max_data_bytes),
+        max_data_bytes
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(result)
+
+    return memoryview(out_buffer)[:result]
+
+
+libopus_encode_float = opuslib.api.libopus.opus_multistream_encode_float
+libopus_encode_float.argtypes = (
+    MultiStreamEncoderPointer,
+    opuslib.api.c_float_pointer,
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_int32
+)
+libopus_encode_float.restype = ctypes.c_int
+
+
+def encode_float_into(
+        encoder_state: ctypes.Structure,
+        pcm_data: typing.Any,
+        frame_size: int,
+        out_buffer: typing.Any,
+        max_data_bytes: typing.Optional[int] = None
+) -> memoryview:
+    """
+    Encodes one frame of every stream from floating point input into a
+    preallocated output buffer. See `encode_into`.
+    """
+    if max_data_bytes is None:
+        max_data_bytes = len(out_buffer)
+
+    result = libopus_encode_float(
+        encoder_state,
+        opuslib.api.buffer_pointer(pcm_data, opuslib.api.c_float_pointer),
+        frame_size,
+        opuslib.api.buffer_array(out_buffer, ctypes.c_char, max_data_bytes),
+        max_data_bytes
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(result)
+
+    return memoryview(out_buffer)[:result]
+
+
+destroy_encoder = opuslib.api.libopus.opus_multistream_encoder_destroy
+destroy_encoder.argtypes = (MultiStreamEncoderPointer,)
+destroy_encoder.restype = None
+destroy_encoder.__doc__ = \
+    'Frees an OpusMSEncoder allocated by opus_multistream_encoder_create()'
+
+
+#
+# Decoder
+#
+
+libopus_decoder_get_size = \
+    opuslib.api.libopus.opus_multistream_decoder_get_size
+libopus_decoder_get_size.argtypes = (ctypes.c_int, ctypes.c_int)
+libopus_decoder_get_size.restype = ctypes.c_int32
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def get_decoder_size(
+        streams: int,
+        coupled_streams: int
+) -> typing.Union[int, typing.Any]:
+    """Gets the size of an OpusMSDecoder structure."""
+    return libopus_decoder_get_size(streams, coupled_streams)
+
+
+libopus_decoder_create = opuslib.api.libopus.opus_multistream_decoder_create
+libopus_decoder_create.argtypes = (
+    ctypes.c_int32,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_char_p,
+    opuslib.api.c_int_pointer
+)
+libopus_decoder_create.restype = MultiStreamDecoderPointer
+
+
+def create_decoder_state(
+        fs: int,
+        channels: int,
+        streams: int,
+        coupled_streams: int,
+        mapping: typing.Sequence[int]
+) -> ctypes.Structure:
+    """
+    Allocates and initializes a multistream decoder state.
+
+    :param fs: Sample rate to decode at (Hz).
+    :param channels: Number of interleaved output channels.
+    :param streams: Total number of streams in the input.
+    :param coupled_streams: How many of `streams` are coupled (stereo).
+    :param mapping: Decoded stream channel for each output channel, or 255
+        for silence.
+    """
+    result_code = ctypes.c_int()
+
+    result = libopus_decoder_create(
+        fs,
+        channels,
+        streams,
+        coupled_streams,
+        _mapping_bytes(mapping, channels, streams, coupled_streams),
+        ctypes.byref(result_code)
+    )
+
+    if result_code.value != opuslib.OK:
+        raise opuslib.OpusError(result_code.value)
+
+    return result
+
+
+libopus_decoder_ctl = opuslib.api.libopus.opus_multistream_decoder_ctl
+libopus_decoder_ctl.restype = ctypes.c_int
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def decoder_ctl(
+        decoder_state: ctypes.Structure,
+        request,
+        value=None
+) -> typing.Union[int, typing.Any]:
+    if value is not None:
+        return request(libopus_decoder_ctl, decoder_state, value)
+    return request(libopus_decoder_ctl, decoder_state)
+
+
+libopus_decode = opuslib.api.libopus.opus_multistream_decode
+libopus_decode.argtypes = (
+    MultiStreamDecoderPointer,
+    ctypes.c_char_p,
+    ctypes.c_int32,
+    opuslib.api.c_int16_pointer,
+    ctypes.c_int,
+    ctypes.c_int
+)
+libopus_decode.restype = ctypes.c_int
+
+
+def decode_into(  # pylint: disable=too-many-arguments
+        decoder_state: ctypes.Structure,
+        opus_data: typing.Optional[bytes],
+        out_buffer: typing.Any,
+        frame_size: int,
+        decode_fec: bool,
+        channels: int
+) -> int:
+    """
+    Decodes a multistream packet to interleaved PCM in `out_buffer`, which
+    must hold `frame_size * channels` 16-bit samples.
+
+    Passing `None` as `opus_data` produces a concealment frame.
+    Returns the number of decoded samples per channel.
+    """
+    pcm = opuslib.api.buffer_array(
+        out_buffer, ctypes.c_int16, frame_size * channels)
+
+    result = libopus_decode(
+        decoder_state,
+        opus_data,
+        len(opus_data) if opus_data is not None else 0,
+        pcm,
+        frame_size,
+        int(decode_fec)
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(result)
+
+    return result
+
+
+libopus_decode_float = opuslib.api.libopus.opus_multistream_decode_float
+libopus_decode_float.argtypes = (
+    MultiStreamDecoderPointer,
+    ctypes.c_char_p,
+    ctypes.c_int32,
+    opuslib.api.c_float_pointer,
+    ctypes.c_int,
+    ctypes.c_int
+)
+libopus_decode_float.restype = ctypes.c_int
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def decode_float(  # pylint: disable=too-many-arguments
+        decoder_state: ctypes.Structure,
+        opus_data: typing.Optional[bytes],
+        frame_size: int,
+        decode_fec: bool,
+        channels: int
+) -> typing.Union[bytes, typing.Any]:
+    """Decodes a multistream packet to interleaved floating point PCM."""
+    pcm = (ctypes.c_float * (frame_size * channels))()
+
+    result = libopus_decode_float(
+        decoder_state,
+        opus_data,
+        len(opus_data) if opus_data is not None else 0,
+        pcm,
+        frame_size,
+        int(decode_fec)
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(result)
+
+    return ctypes.string_at(
+        pcm, result * channels * ctypes.sizeof(ctypes.c_float))
+
+
+destroy_decoder = opuslib.api.libopus.opus_multistream_decoder_destroy
+destroy_decoder.argtypes = (MultiStreamDecoderPointer,)
+destroy_decoder.restype = None
+destroy_decoder.__doc__ = \
+    'Frees an OpusMSDecoder allocated by opus_multistream_decoder_create()'
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name
+#
+
+"""
+CTypes mapping between libopus repacketizer functions and Python.
+
+The repacketizer merges consecutive Opus packets into one multi-frame
+packet, or extracts frames back out of one, without decoding.
+"""
+
+import ctypes  # type: ignore
+import typing
+
+import opuslib
+import opuslib.api
+
+__author__ = 'Никита Кузнецов <self@svartalf.info>'
+__copyright__ = 'Copyright (c) 2012, SvartalF'
+__license__ = 'BSD 3-Clause License'
+
+
+class Repacketizer(ctypes.Structure):  # pylint: disable=too-few-public-methods
+    """Opus repacketizer state."""
+    pass
+
+
+RepacketizerPointer = ctypes.POINTER(Repacketizer)
+
+c_char_pointer = ctypes.POINTER(ctypes.c_char)
+
+# Upper bound on the output size per frame held by a repacketizer
+MAX_BYTES_PER_FRAME = 1277
+
+
+libopus_create = opuslib.api.libopus.opus_repacketizer_create
+libopus_create.argtypes = None
+libopus_create.restype = RepacketizerPointer
+
+
+def create_state() -> ctypes.Structure:
+    """Allocates and initializes a repacketizer state."""
+    result = libopus_create()
+
+    if not result:
+        raise opuslib.OpusError(opuslib.ALLOC_FAIL)
+
+    return result
+
+
+libopus_init = opuslib.api.libopus.opus_repacketizer_init
+libopus_init.argtypes = (RepacketizerPointer,)
+libopus_init.restype = RepacketizerPointer
+
+
+def init(repacketizer_state: ctypes.Structure) -> None:
+    """
+    Re-initializes a repacketizer state, dropping the packets added since
+    the last call. Must be called before adding packets with a different
+    TOC configuration.
+    """
+    libopus_init(repacketizer_state)
+
+
+libopus_cat = opuslib.api.libopus.opus_repacketizer_cat
+libopus_cat.argtypes = (RepacketizerPointer, c_char_pointer, ctypes.c_int32)
+libopus_cat.restype = ctypes.c_int
+
+
+def cat(repacketizer_state: ctypes.Structure, data: typing.Any) -> typing.Any:
+    """
+    Adds a packet to the repacketizer state.
+
+    `data` may be any buffer-protocol object and is not copied. libopus
+    keeps pointing into it until the next `init`, so the returned pointer,
+    which keeps `data` alive, must be held on to until then.
+    """
+    data_pointer = opuslib.api.buffer_pointer(data, c_char_pointer)
+
+    result = libopus_cat(repacketizer_state, data_pointer, len(data))
+
+    if result != opuslib.OK:
+        raise opuslib.OpusError(result)
+
+    return data_pointer
+
+
+libopus_get_nb_frames = opuslib.api.libopus.opus_repacketizer_get_nb_frames
+libopus_get_nb_frames.argtypes = (RepacketizerPointer,)
+libopus_get_nb_frames.restype = ctypes.c_int
+
+
+# FIXME: Remove typing.Any once we have a stub for ctypes
+def get_nb_frames(
+        repacketizer_state: ctypes.Structure
+) -> typing.Union[int, typing.Any]:
+    """Gets the number of frames added since the last `init`."""
+    return libopus_get_nb_frames(repacketizer_state)
+
+
+libopus_out_range = opuslib.api.libopus.opus_repacketizer_out_range
+libopus_out_range.argtypes = (
+    RepacketizerPointer,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_int32
+)
+libopus_out_range.restype = ctypes.c_int32
+
+
+def out_range_into(
+        repacketizer_state: ctypes.Structure,
+        begin: int,
+        end: int,
+        out_buffer: typing.Any,
+        max_data_bytes: typing.Optional[int] = None
+) -> memoryview:
+    """
+    Writes frames `begin` (inclusive) to `end` (exclusive) as one packet
+    into a preallocated output buffer.
+
+    Returns a memoryview of `out_buffer` covering the written packet.
+    """
+    if max_data_bytes is None:
+        max_data_bytes = len(out_buffer)
+
+    result = libopus_out_range(
+        repacketizer_state,
+        begin,
+        end,
+        opuslib.api.buffer_array(out_buffer, ctypes.c_char, max_data_bytes),
+        max_data_bytes
+    )
+
+    if result < 0:
+        raise opuslib.OpusError(result)
+
+    return memoryview(out_buffer)[:result]
+
+
+destroy = opuslib.api.libopus.opus_repacketizer_destroy
+destroy.argtypes = (RepacketizerPointer,)
+destroy.restype = None
+destroy.__doc__ = \
+    'Frees an OpusRepacketizer allocated by opus_repacketizer_create()'
@@ -10,12 +10,59 @@ import opuslib.api
 import opuslib.api.ctl
 import opuslib.api.decoder
 import opuslib.api.encoder
+import opuslib.api.multistream
+import opuslib.api.repacketizer
 
 __author__ = 'Никита Кузнецов <self@svartalf.info>'
 __copyright__ = 'Copyright (c) 2012, SvartalF'
 __license__ = 'BSD 3-Clause License'
 
 
+def _application_value(application) -> int:
+    # Check to see if the Encoder Application Macro is available:
+    if application in list(opuslib.APPLICATION_TYPES_MAP.keys()):
+        return opuslib.APPLICATION_TYPES_MAP[application]
+    elif application in list(opuslib.APPLICATION_TYPES_MAP.values()):
+        return application
+    raise ValueError(
+        "`application` value must be in 'voip', 'audio' or "
+        "'restricted_lowdelay'")
+
+
+_NOT_CACHED = object()
+
+
+def _cached_ctl_property(name: str, get_request, set_request) -> property:
+    """
+    CTL property of an encoder setting. On an encoder in cached mode, reads
+    are answered from the last value libopus applied (the last value set on
+    a multistream encoder) instead of a round-trip.
+    """
+
+    def _get(self):
+        cache = self._ctl_cache
+        if cache is None:
+            return self._ctl(get_request)
+        value = cache.get(name, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            value = cache[name] = self._ctl(get_request)
+        return value
+
+    def _set(self, value):
+        self._ctl(set_request, value)
+        cache = self._ctl_cache
+        if cache is None:
+            return
+        if self._cache_applied_value:
+            # libopus clamps some values (bitrate to 500..300000 per channel)
+            # and resolves AUTO and BITRATE_MAX, so cache what it applied
+            cache[name] = self._ctl(get_request)
+        else:
+            cache[name] = value
+
+    return property(_get, _set)
+
+
 class Decoder(object):
 
     """High-Level Decoder Object."""
@@ -27,6 +74,8 @@ class Decoder(object):
         """
         self._fs = fs
         self._channels = channels
+        # Scratch PCM buffer reused by `decode`, grown on demand.
+        self._pcm_buffer = bytearray()
         self.decoder_state = opuslib.api.decoder.create_state(fs, channels)
 
     def __del__(self) -> None:
@@ -34,14 +83,15 @@ class Decoder(object):
             # Destroying state only if __init__ completed successfully
             opuslib.api.decoder.destroy(self.decoder_state)
 
+    def _ctl(self, request, value=None):
+        return opuslib.api.decoder.decoder_ctl(
+            self.decoder_state, request, value)
+
     def reset_state(self) -> None:
         """
         Resets the codec state to be equivalent to a freshly initialized state
         """
-        opuslib.api.decoder.decoder_ctl(
-            self.decoder_state,
-            opuslib.api.ctl.reset_state
-        )
+        self._ctl(opuslib.api.ctl.reset_state)
 
     # FIXME: Remove typing.Any once we have a stub for ctypes
     def decode(
@@ -53,10 +103,33 @@ class Decoder(object):
         """
         Decodes given Opus data to PCM.
         """
-        return opuslib.api.decoder.decode(
+        pcm_size = frame_size * self._channels * 2
+        if len(self._pcm_buffer) < pcm_size:
+            self._pcm_buffer = bytearray(pcm_size)
+
+        result = self.decode_into(
+            opus_data, self._pcm_buffer, frame_size, decode_fec)
+
+        with memoryview(self._pcm_buffer) as pcm:
+            return bytes(pcm[:result * self._channels * 2])
+
+    def decode_into(
+            self,
+            opus_data: typing.Optional[bytes],
+            out_buffer: typing.Any,
+            frame_size: int,
+            decode_fec: bool = False
+        ) -> int:
+        """
+        Decodes given Opus data to PCM directly into a writable buffer.
+
+        Passing `None` as `opus_data` produces a concealment frame.
+        Returns the number of decoded samples per channel.
+        """
+        return opuslib.api.decoder.decode_into(
             self.decoder_state,
             opus_data,
-            len(opus_data),
+            out_buffer,
             frame_size,
             decode_fec,
             channels=self._channels
@@ -83,47 +156,30 @@ class Decoder(object):
 
     # CTL interfaces
 
-    _get_final_range = lambda self: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
-        opuslib.api.ctl.get_final_range
-    )
+    _get_final_range = lambda self: self._ctl(opuslib.api.ctl.get_final_range)
 
     final_range = property(_get_final_range)
 
-    _get_bandwidth = lambda self: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
-        opuslib.api.ctl.get_bandwidth
-    )
+    _get_bandwidth = lambda self: self._ctl(opuslib.api.ctl.get_bandwidth)
 
     bandwidth = property(_get_bandwidth)
 
-    _get_pitch = lambda self: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
-        opuslib.api.ctl.get_pitch
-    )
+    _get_pitch = lambda self: self._ctl(opuslib.api.ctl.get_pitch)
 
     pitch = property(_get_pitch)
 
-    _get_lsb_depth = lambda self: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
-        opuslib.api.ctl.get_lsb_depth
-    )
+    _get_lsb_depth = lambda self: self._ctl(opuslib.api.ctl.get_lsb_depth)
 
-    _set_lsb_depth = lambda self, x: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
+    _set_lsb_depth = lambda self, x: self._ctl(
         opuslib.api.ctl.set_lsb_depth,
         x
     )
 
     lsb_depth = property(_get_lsb_depth, _set_lsb_depth)
 
-    _get_gain = lambda self: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
-        opuslib.api.ctl.get_gain
-    )
+    _get_gain = lambda self: self._ctl(opuslib.api.ctl.get_gain)
 
-    _set_gain = lambda self, x: opuslib.api.decoder.decoder_ctl(
-        self.decoder_state,
+    _set_gain = lambda self, x: self._ctl(
         opuslib.api.ctl.set_gain,
         x
     )
@@ -135,25 +191,27 @@ class Encoder(object):
 
     """High-Level Encoder Object."""
 
-    def __init__(self, fs, channels, application) -> None:
+    # Last value applied for each setting, when in cached mode
+    _ctl_cache: typing.Optional[typing.Dict[str, int]] = None
+
+    # Whether a setting reads back as applied right after it is set
+    _cache_applied_value = True
+
+    def __init__(self, fs, channels, application, cached=False) -> None:
         """
         Parameters:
             fs : sampling rate
             channels : number of channels
+            cached : answer setting reads from the last value applied
         """
-        # Check to see if the Encoder Application Macro is available:
-        if application in list(opuslib.APPLICATION_TYPES_MAP.keys()):
-            application = opuslib.APPLICATION_TYPES_MAP[application]
-        elif application in list(opuslib.APPLICATION_TYPES_MAP.values()):
-            pass  # Nothing to do here
-        else:
-            raise ValueError(
-                "`application` value must be in 'voip', 'audio' or "
-                "'restricted_lowdelay'")
+        application = _application_value(application)
 
         self._fs = fs
         self._channels = channels
         self._application = application
+        self._ctl_cache = {} if cached else None
+        # Scratch output buffer reused by `encode`, grown on demand.
+        self._opus_buffer = bytearray()
         self.encoder_state = opuslib.api.encoder.create_state(
             fs, channels, application)
 
@@ -162,22 +220,59 @@ class Encoder(object):
             # Destroying state only if __init__ completed successfully
             opuslib.api.encoder.destroy(self.encoder_state)
 
+    def _ctl(self, request, value=None):
+        return opuslib.api.encoder.encoder_ctl(
+            self.encoder_state, request, value)
+
     def reset_state(self) -> None:
         """
         Resets the codec state to be equivalent to a freshly initialized state
         """
-        opuslib.api.encoder.encoder_ctl(
-            self.encoder_state, opuslib.api.ctl.reset_state)
+        self._ctl(opuslib.api.ctl.reset_state)
+
+    @property
+    def cached(self) -> bool:
+        """
+        Whether setting reads (bitrate, complexity, inband_fec, dtx...) are
+        answered from memory instead of querying libopus.
+        """
+        return self._ctl_cache is not None
+
+    @cached.setter
+    def cached(self, value: bool) -> None:
+        if not value:
+            self._ctl_cache = None
+        elif self._ctl_cache is None:
+            self._ctl_cache = {}
 
     def encode(self, pcm_data: bytes, frame_size: int) -> bytes:
         """
         Encodes given PCM data as Opus.
         """
-        return opuslib.api.encoder.encode(
+        if len(self._opus_buffer) < len(pcm_data):
+            self._opus_buffer = bytearray(len(pcm_data))
+
+        return bytes(self.encode_into(
+            pcm_data, frame_size, self._opus_buffer, len(pcm_data)))
+
+    def encode_into(
+            self,
+            pcm_data: typing.Any,
+            frame_size: int,
+            out_buffer: typing.Any,
+            max_data_bytes: typing.Optional[int] = None
+        ) -> memoryview:
+        """
+        Encodes given PCM data as Opus into a preallocated buffer.
+
+        Returns a memoryview of `out_buffer` covering the encoded packet.
+        """
+        return opuslib.api.encoder.encode_into(
             self.encoder_state,
             pcm_data,
             frame_size,
-            len(pcm_data)
+            out_buffer,
+            max_data_bytes
         )
 
     def encode_float(self, pcm_data: bytes, frame_size: int) -> bytes:
@@ -193,129 +288,391 @@ class Encoder(object):
 
     # CTL interfaces
 
-    _get_final_range = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state,
-        opuslib.api.ctl.get_final_range
-    )
+    _get_final_range = lambda self: self._ctl(opuslib.api.ctl.get_final_range)
 
     final_range = property(_get_final_range)
 
-    _get_bandwidth = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_bandwidth)
+    _get_bandwidth = lambda self: self._ctl(opuslib.api.ctl.get_bandwidth)
 
     bandwidth = property(_get_bandwidth)
 
-    _get_pitch = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_pitch)
+    _get_pitch = lambda self: self._ctl(opuslib.api.ctl.get_pitch)
 
     pitch = property(_get_pitch)
 
-    _get_lsb_depth = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_lsb_depth)
+    lsb_depth = _cached_ctl_property(
+        'lsb_depth',
+        opuslib.api.ctl.get_lsb_depth,
+        opuslib.api.ctl.set_lsb_depth
+    )
 
-    _set_lsb_depth = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_lsb_depth, x)
+    complexity = _cached_ctl_property(
+        'complexity',
+        opuslib.api.ctl.get_complexity,
+        opuslib.api.ctl.set_complexity
+    )
 
-    lsb_depth = property(_get_lsb_depth, _set_lsb_depth)
+    bitrate = _cached_ctl_property(
+        'bitrate',
+        opuslib.api.ctl.get_bitrate,
+        opuslib.api.ctl.set_bitrate
+    )
 
-    _get_complexity = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_complexity)
+    vbr = _cached_ctl_property(
+        'vbr',
+        opuslib.api.ctl.get_vbr,
+        opuslib.api.ctl.set_vbr
+    )
 
-    _set_complexity = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_complexity, x)
+    vbr_constraint = _cached_ctl_property(
+        'vbr_constraint',
+        opuslib.api.ctl.get_vbr_constraint,
+        opuslib.api.ctl.set_vbr_constraint
+    )
 
-    complexity = property(_get_complexity, _set_complexity)
+    force_channels = _cached_ctl_property(
+        'force_channels',
+        opuslib.api.ctl.get_force_channels,
+        opuslib.api.ctl.set_force_channels
+    )
 
-    _get_bitrate = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_bitrate)
+    max_bandwidth = _cached_ctl_property(
+        'max_bandwidth',
+        opuslib.api.ctl.get_max_bandwidth,
+        opuslib.api.ctl.set_max_bandwidth
+    )
 
-    _set_bitrate = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_bitrate, x)
+    _set_bandwidth = lambda self, x: self._ctl(
+        opuslib.api.ctl.set_bandwidth, x)
 
-    bitrate = property(_get_bitrate, _set_bitrate)
+    bandwidth = property(None, _set_bandwidth)
 
-    _get_vbr = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_vbr)
+    signal = _cached_ctl_property(
+        'signal',
+        opuslib.api.ctl.get_signal,
+        opuslib.api.ctl.set_signal
+    )
 
-    _set_vbr = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_vbr, x)
+    application = _cached_ctl_property(
+        'application',
+        opuslib.api.ctl.get_application,
+        opuslib.api.ctl.set_application
+    )
 
-    vbr = property(_get_vbr, _set_vbr)
+    _get_sample_rate = lambda self: self._ctl(opuslib.api.ctl.get_sample_rate)
 
-    _get_vbr_constraint = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_vbr_constraint)
+    sample_rate = property(_get_sample_rate)
 
-    _set_vbr_constraint = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_vbr_constraint, x)
+    _get_lookahead = lambda self: self._ctl(opuslib.api.ctl.get_lookahead)
 
-    vbr_constraint = property(_get_vbr_constraint, _set_vbr_constraint)
+    lookahead = property(_get_lookahead)
 
-    _get_force_channels = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_force_channels)
+    inband_fec = _cached_ctl_property(
+        'inband_fec',
+        opuslib.api.ctl.get_inband_fec,
+        opuslib.api.ctl.set_inband_fec
+    )
 
-    _set_force_channels = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_force_channels, x)
+    packet_loss_perc = _cached_ctl_property(
+        'packet_loss_perc',
+        opuslib.api.ctl.get_packet_loss_perc,
+        opuslib.api.ctl.set_packet_loss_perc
+    )
 
-    force_channels = property(_get_force_channels, _set_force_channels)
+    dtx = _cached_ctl_property(
+        'dtx',
+        opuslib.api.ctl.get_dtx,
+        opuslib.api.ctl.set_dtx
+    )
 
-    _get_max_bandwidth = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_max_bandwidth)
+    # Settings accepted by `configure`
+    CONFIGURABLE_CTLS = (
+        'lsb_depth', 'complexity', 'bitrate', 'vbr', 'vbr_constraint',
+        'force_channels', 'max_bandwidth', 'signal', 'application',
+        'inband_fec', 'packet_loss_perc', 'dtx'
+    )
 
-    _set_max_bandwidth = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_max_bandwidth, x)
+    def configure(self, **settings) -> None:
+        """
+        Applies several CTL settings in one call, e.g.
+        `encoder.configure(bitrate=24000, inband_fec=1, packet_loss_perc=10)`
 
-    max_bandwidth = property(_get_max_bandwidth, _set_max_bandwidth)
+        In cached mode, settings that already hold the requested value are
+        not sent to libopus again.
+        """
+        unknown = set(settings) - set(self.CONFIGURABLE_CTLS)
+        if unknown:
+            raise ValueError(
+                'Unknown encoder settings: {}'.format(', '.join(sorted(unknown))))
 
-    _set_bandwidth = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_bandwidth, x)
+        cache = self._ctl_cache
+        for name, value in settings.items():
+            if cache is not None and cache.get(name, _NOT_CACHED) == value:
+                continue
+            setattr(self, name, value)
 
-    bandwidth = property(None, _set_bandwidth)
 
-    _get_signal = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_signal)
+class MultiStreamDecoder(Decoder):
 
-    _set_signal = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_signal, x)
+    """
+    High-Level Multistream Decoder Object.
 
-    signal = property(_get_signal, _set_signal)
+    Decodes packets carrying several Opus streams into interleaved PCM in a
+    single call. Shares the CTL properties of `Decoder`.
+    """
 
-    _get_application = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_application)
+    def __init__(  # pylint: disable=super-init-not-called
+            self,
+            fs: int,
+            channels: int,
+            streams: int,
+            coupled_streams: int,
+            mapping: typing.Sequence[int]
+        ) -> None:
+        """
+        :param fs: Sample Rate.
+        :param channels: Number of output channels.
+        :param streams: Number of streams in each packet.
+        :param coupled_streams: Number of coupled (stereo) streams.
+        :param mapping: Decoded stream channel for each output channel.
+        """
+        self._fs = fs
+        self._channels = channels
+        self._streams = streams
+        self._coupled_streams = coupled_streams
+        self._mapping = tuple(mapping)
+        self._pcm_buffer = bytearray()
+        self.decoder_state = opuslib.api.multistream.create_decoder_state(
+            fs, channels, streams, coupled_streams, self._mapping)
 
-    _set_application = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_application, x)
+    def __del__(self) -> None:
+        if hasattr(self, 'decoder_state'):
+            # Destroying state only if __init__ completed successfully
+            opuslib.api.multistream.destroy_decoder(self.decoder_state)
 
-    application = property(_get_application, _set_application)
+    def _ctl(self, request, value=None):
+        return opuslib.api.multistream.decoder_ctl(
+            self.decoder_state, request, value)
 
-    _get_sample_rate = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_sample_rate)
+    def decode_into(
+            self,
+            opus_data: typing.Optional[bytes],
+            out_buffer: typing.Any,
+            frame_size: int,
+            decode_fec: bool = False
+        ) -> int:
+        """
+        Decodes a multistream packet to interleaved PCM directly into a
+        writable buffer. Returns the number of samples per channel.
+        """
+        return opuslib.api.multistream.decode_into(
+            self.decoder_state,
+            opus_data,
+            out_buffer,
+            frame_size,
+            decode_fec,
+            self._channels
+        )
 
-    sample_rate = property(_get_sample_rate)
+    # FIXME: Remove typing.Any once we have a stub for ctypes
+    def decode_float(
+            self,
+            opus_data: bytes,
+            frame_size: int,
+            decode_fec: bool = False
+        ) -> typing.Union[bytes, typing.Any]:
+        """
+        Decodes a multistream packet to interleaved floating point PCM.
+        """
+        return opuslib.api.multistream.decode_float(
+            self.decoder_state,
+            opus_data,
+            frame_size,
+            decode_fec,
+            self._channels
+        )
 
-    _get_lookahead = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_lookahead)
 
-    lookahead = property(_get_lookahead)
+class MultiStreamEncoder(Encoder):
 
-    _get_inband_fec = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_inband_fec)
+    """
+    High-Level Multistream Encoder Object.
 
-    _set_inband_fec = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.set_inband_fec)
+    Encodes interleaved PCM for several Opus streams into a single packet
+    per frame. Shares the CTL properties of `Encoder`, which apply to every
+    stream.
+    """
 
-    inband_fec = property(_get_inband_fec, _set_inband_fec)
+    # The bitrate is only shared out across the streams on the next encode,
+    # reading it back earlier returns a stale value, so cache the request
+    _cache_applied_value = False
 
-    _get_packet_loss_perc = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_packet_loss_perc)
+    def __init__(  # pylint: disable=super-init-not-called
+            self,
+            fs: int,
+            channels: int,
+            streams: int,
+            coupled_streams: int,
+            mapping: typing.Sequence[int],
+            application,
+            cached: bool = False
+        ) -> None:
+        """
+        Parameters:
+            fs : sampling rate
+            channels : number of input channels
+            streams : number of streams to encode
+            coupled_streams : number of coupled (stereo) streams
+            mapping : stream channel for each input channel
+            cached : answer setting reads from the last value applied
+        """
+        application = _application_value(application)
 
-    _set_packet_loss_perc = \
-        lambda self, x: opuslib.api.encoder.encoder_ctl(
-            self.encoder_state, opuslib.api.ctl.set_packet_loss_perc, x)
+        self._fs = fs
+        self._channels = channels
+        self._streams = streams
+        self._coupled_streams = coupled_streams
+        self._mapping = tuple(mapping)
+        self._application = application
+        self._ctl_cache = {} if cached else None
+        self._opus_buffer = bytearray()
+        self.encoder_state = opuslib.api.multistream.create_encoder_state(
+            fs, channels, streams, coupled_streams, self._mapping,
+            application)
+
+    def __del__(self) -> None:
+        if hasattr(self, 'encoder_state'):
+            # Destroying state only if __init__ completed successfully
+            opuslib.api.multistream.destroy_encoder(self.encoder_state)
+
+    def _ctl(self, request, value=None):
+        return opuslib.api.multistream.encoder_ctl(
+            self.encoder_state, request, value)
+
+    def encode_float(self, pcm_data: bytes, frame_size: int) -> bytes:
+        """
+        Encodes given interleaved floating point PCM data as Opus.
+        """
+        if len(self._opus_buffer) < len(pcm_data):
+            self._opus_buffer = bytearray(len(pcm_data))
+
+        return bytes(opuslib.api.multistream.encode_float_into(
+            self.encoder_state,
+            pcm_data,
+            frame_size,
+            self._opus_buffer,
+            len(pcm_data)
+        ))
+
+    def encode_into(
+            self,
+            pcm_data: typing.Any,
+            frame_size: int,
+            out_buffer: typing.Any,
+            max_data_bytes: typing.Optional[int] = None
+        ) -> memoryview:
+        """
+        Encodes given interleaved PCM data as one multistream packet into
+        a preallocated buffer.
+        """
+        return opuslib.api.multistream.encode_into(
+            self.encoder_state,
+            pcm_data,
+            frame_size,
+            out_buffer,
+            max_data_bytes
+        )
 
-    packet_loss_perc = property(_get_packet_loss_perc, _set_packet_loss_perc)
 
-    _get_dtx = lambda self: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_dtx)
+class Repacketizer(object):
 
-    _set_dtx = lambda self, x: opuslib.api.encoder.encoder_ctl(
-        self.encoder_state, opuslib.api.ctl.get_dtx, x)
+    """
+    High-Level Repacketizer Object.
+
+    Concatenates consecutive encoded frames into one packet and splits
+    multi-frame packets back out, without decoding and re-encoding. All
+    packets merged together must share the same TOC configuration and may
+    add up to at most 120 ms.
+    """
+
+    def __init__(self) -> None:
+        # libopus only stores pointers into the added packets, so they are
+        # kept alive here until the next reset.
+        self._packets: typing.List[typing.Any] = []
+        self._out_buffer = bytearray()
+        self.repacketizer_state = opuslib.api.repacketizer.create_state()
+
+    def __del__(self) -> None:
+        if hasattr(self, 'repacketizer_state'):
+            # Destroying state only if __init__ completed successfully
+            opuslib.api.repacketizer.destroy(self.repacketizer_state)
+
+    def reset(self) -> None:
+        """Drops every packet added so far."""
+        opuslib.api.repacketizer.init(self.repacketizer_state)
+        self._packets.clear()
+
+    def cat(self, opus_data: typing.Any) -> None:
+        """Adds a packet (any buffer-protocol object) without copying it."""
+        self._packets.append(
+            opuslib.api.repacketizer.cat(self.repacketizer_state, opus_data))
+
+    @property
+    def nb_frames(self) -> int:
+        """Number of frames added since the last reset."""
+        return opuslib.api.repacketizer.get_nb_frames(
+            self.repacketizer_state)
+
+    def out_range_into(
+            self,
+            begin: int,
+            end: int,
+            out_buffer: typing.Any
+        ) -> memoryview:
+        """
+        Writes frames `begin` to `end` (exclusive) as one packet into a
+        preallocated buffer.
+        """
+        return opuslib.api.repacketizer.out_range_into(
+            self.repacketizer_state, begin, end, out_buffer)
+
+    def out_range(self, begin: int, end: int) -> bytes:
+        """Returns frames `begin` to `end` (exclusive) as one packet."""
+        max_data_bytes = \
+            opuslib.api.repacketizer.MAX_BYTES_PER_FRAME * (end - begin)
+        if len(self._out_buffer) < max_data_bytes:
+            self._out_buffer = bytearray(max_data_bytes)
+
+        return bytes(opuslib.api.repacketizer.out_range_into(
+            self.repacketizer_state,
+            begin,
+            end,
+            self._out_buffer,
+            max_data_bytes
+        ))
+
+    def out(self) -> bytes:
+        """Returns every frame added since the last reset as one packet."""
+        return self.out_range(0, self.nb_frames)
+
+    def merge(self, packets: typing.Iterable[typing.Any]) -> bytes:
+        """Concatenates consecutive packets into a single packet."""
+        self.reset()
+        try:
+            for packet in packets:
+                self.cat(packet)
+            return self.out()
+        finally:
+            self.reset()
+
+    def split(self, opus_data: typing.Any) -> typing.List[bytes]:
+        """Splits a multi-frame packet into single-frame packets."""
+        self.reset()
+        try:
+            self.cat(opus_data)
+            return [
+                self.out_range(frame, frame + 1)
+                for frame in range(self.nb_frames)
+            ]
+        finally:
+            self.reset()
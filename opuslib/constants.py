@@ -90,6 +90,9 @@ GET_PREDICTION_DISABLED_REQUEST = 4043
 
 AUTO = -1000
 
+# Maximum bitrate
+BITRATE_MAX = -1
+
 BANDWIDTH_NARROWBAND = 1101
 BANDWIDTH_MEDIUMBAND = 1102
 BANDWIDTH_WIDEBAND = 1103
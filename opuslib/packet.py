@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pure Python Opus packet inspection.
+
+Reads the TOC byte (RFC 6716, section 3.1) of Opus packets without a
+decoder state or a call into libopus, so that large numbers of packets
+can be inspected cheaply.
+"""
+
+import typing
+
+import opuslib.constants
+import opuslib.exceptions
+
+__author__ = 'Никита Кузнецов <self@svartalf.info>'
+__copyright__ = 'Copyright (c) 2012, SvartalF'
+__license__ = 'BSD 3-Clause License'
+
+
+# Coding modes, matching `MODE_*` in libopus
+MODE_SILK_ONLY = 1000
+MODE_HYBRID = 1001
+MODE_CELT_ONLY = 1002
+
+# Opus packets never carry more than 120 ms of audio
+_MAX_SAMPLES = 5760
+
+_SAMPLE_RATE = 48000
+
+
+def _toc_entry(toc: int) -> typing.Tuple[int, int, int, int, int]:
+    """
+    Decodes a TOC byte to (bandwidth, mode, channels, samples per frame at
+    48 kHz, frame count code).
+    """
+    config = toc >> 3
+
+    if config < 12:
+        mode = MODE_SILK_ONLY
+        bandwidth = (
+            opuslib.constants.BANDWIDTH_NARROWBAND,
+            opuslib.constants.BANDWIDTH_MEDIUMBAND,
+            opuslib.constants.BANDWIDTH_WIDEBAND
+        )[config >> 2]
+        samples_per_frame = (480, 960, 1920, 2880)[config & 0x3]
+    elif config < 16:
+        mode = MODE_HYBRID
+        if config < 14:
+            bandwidth = opuslib.constants.BANDWIDTH_SUPERWIDEBAND
+        else:
+            bandwidth = opuslib.constants.BANDWIDTH_FULLBAND
+        samples_per_frame = (480, 960)[config & 0x1]
+    else:
+        mode = MODE_CELT_ONLY
+        bandwidth = (
+            opuslib.constants.BANDWIDTH_NARROWBAND,
+            opuslib.constants.BANDWIDTH_WIDEBAND,
+            opuslib.constants.BANDWIDTH_SUPERWIDEBAND,
+            opuslib.constants.BANDWIDTH_FULLBAND
+        )[(config - 16) >> 2]
+        samples_per_frame = (120, 240, 480, 960)[config & 0x3]
+
+    channels = 2 if toc & 0x4 else 1
+
+    return bandwidth, mode, channels, samples_per_frame, toc & 0x3
+
+
+_TOC_TABLE = tuple(_toc_entry(toc) for toc in range(256))
+
+
+class PacketInfo(object):
+
+    """Header information of a single Opus packet."""
+
+    __slots__ = ('bandwidth', 'mode', 'channels', 'frames', 'samples_per_frame')
+
+    def __init__(
+            self,
+            bandwidth: int,
+            mode: int,
+            channels: int,
+            frames: int,
+            samples_per_frame: int
+        ) -> None:
+        """
+        :param bandwidth: One of the `BANDWIDTH_*` constants.
+        :param mode: One of the `MODE_*` constants.
+        :param channels: Number of coded channels (1 or 2).
+        :param frames: Number of frames in the packet.
+        :param samples_per_frame: Samples per frame at 48 kHz.
+        """
+        self.bandwidth = bandwidth
+        self.mode = mode
+        self.channels = channels
+        self.frames = frames
+        self.samples_per_frame = samples_per_frame
+
+    def __repr__(self) -> str:
+        return (
+            '{}(bandwidth={}, mode={}, channels={}, frames={}, '
+            'samples_per_frame={})'.format(
+                type(self).__name__, self.bandwidth, self.mode,
+                self.channels, self.frames, self.samples_per_frame))
+
+    @property
+    def nb_samples(self) -> int:
+        """Samples per channel in the whole packet, at 48 kHz."""
+        return self.frames * self.samples_per_frame
+
+    @property
+    def duration(self) -> float:
+        """Duration of the packet in seconds."""
+        return self.frames * self.samples_per_frame / _SAMPLE_RATE
+
+    def get_nb_samples(self, fs: int) -> int:
+        """Samples per channel in the whole packet at sample rate `fs`."""
+        return self.frames * self.samples_per_frame * fs // _SAMPLE_RATE
+
+
+def parse_packet(data: typing.Any) -> PacketInfo:
+    """
+    Parses the header of an Opus packet.
+
+    `data` may be any buffer-protocol object holding the packet.
+    Raises `OpusError(INVALID_PACKET)` for truncated, empty or oversized
+    packets.
+    """
+    if len(data) < 1:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+
+    bandwidth, mode, channels, samples_per_frame, code = _TOC_TABLE[data[0]]
+
+    if code == 0:
+        frames = 1
+    elif code != 3:
+        frames = 2
+    elif len(data) < 2:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+    else:
+        frames = data[1] & 0x3F
+
+    if frames == 0 or frames * samples_per_frame > _MAX_SAMPLES:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+
+    return PacketInfo(bandwidth, mode, channels, frames, samples_per_frame)
+
+
+def _first_frame(data: typing.Any, code: int) -> typing.Tuple[int, int]:
+    """Offset and size of the first frame of a packet (RFC 6716, section 3.2)."""
+    length = len(data)
+    if code == 0:
+        return 1, length - 1
+    if code == 1:
+        return 1, (length - 1) // 2
+    if code == 2:
+        return _frame_length(data, 1)
+
+    if length < 2:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+    vbr, padded, frames = data[1] & 0x80, data[1] & 0x40, data[1] & 0x3F
+    offset = 2
+    padding = 0
+    while padded:
+        if offset >= length:
+            raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+        padded = data[offset] == 255
+        padding += 254 if padded else data[offset]
+        offset += 1
+    if vbr:
+        return _frame_length(data, offset)
+    if frames == 0:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+    return offset, (length - offset - padding) // frames
+
+
+def _frame_length(data: typing.Any, offset: int) -> typing.Tuple[int, int]:
+    """Reads a one or two byte frame length at `offset`, returns the offset after it and the length."""
+    if offset >= len(data):
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+    if data[offset] < 252:
+        return offset + 1, data[offset]
+    if offset + 1 >= len(data):
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+    return offset + 2, data[offset] + 4 * data[offset + 1]
+
+
+def packet_has_lbrr(data: typing.Any) -> bool:
+    """
+    Whether the first frame of a packet carries in-band FEC (SILK LBRR)
+    data for the frame before it, like `opus_packet_has_lbrr` in libopus
+    1.5. CELT only packets never do.
+
+    The LBRR flags follow the VAD flags in the first bits of the SILK
+    layer, which the range coder stores as plain bits.
+    """
+    if len(data) < 1:
+        raise opuslib.exceptions.OpusError(opuslib.constants.INVALID_PACKET)
+
+    _, mode, channels, samples_per_frame, code = _TOC_TABLE[data[0]]
+    if mode == MODE_CELT_ONLY:
+        return False
+
+    offset, size = _first_frame(data, code)
+    if size <= 0 or offset >= len(data):
+        return False
+
+    # One VAD flag per 20 ms SILK frame, then the LBRR flag, per channel
+    silk_frames = max(1, samples_per_frame // 960)
+    flags = data[offset]
+    lbrr = (flags >> (7 - silk_frames)) & 1
+    if channels == 2:
+        lbrr |= (flags >> (6 - 2 * silk_frames)) & 1
+    return bool(lbrr)
+
+
+def parse_packets(packets: typing.Iterable[typing.Any]) -> typing.List[PacketInfo]:
+    """Parses the headers of a batch of Opus packets."""
+    return [parse_packet(packet) for packet in packets]
@@ -0,0 +1,89 @@
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # seconds
+
+
+class PendingState:
+    """A state we expect the server to report for our own user, wait blocks until it does"""
+
+    def __init__(self, kind: str, predicate):
+        self.kind = kind
+        self.predicate = predicate
+        self.started = time.monotonic()
+        self.latency: float = None
+
+        self._confirmed = threading.Event()
+
+    @property
+    def confirmed(self) -> bool:
+        return self._confirmed.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._confirmed.wait(timeout)
+
+    def confirm(self, now: float):
+        self.latency = now - self.started
+        self._confirmed.set()
+
+
+class PendingStateTracker:
+    """
+    Confirms commands from the server's UserState updates instead of sleeping and polling. expect registers a
+    predicate on our own user before the command is sent, user_updated must be called from pymumble's user updated
+    callback for our own user and confirms every pending state whose predicate now holds. Confirmation latencies go
+    into a histogram per kind, states that were never confirmed are counted as timeouts once abandoned.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms: dict[str, list[int]] = dict()
+        self.timeouts: dict[str, int] = dict()
+
+        self._pending: list[PendingState] = list()
+        self._lock = threading.Lock()
+
+    def expect(self, kind: str, predicate, current=None) -> PendingState:
+        """
+        current is our own user as last reported. A command that changes nothing is not echoed by the server, so a
+        predicate that already holds for it is confirmed right away instead of waiting for an update that never comes
+        """
+        pending = PendingState(kind, predicate)
+        with self._lock:
+            if current is not None and predicate(current):
+                self._confirm(pending, time.monotonic())
+            else:
+                self._pending.append(pending)
+        return pending
+
+    def wait(self, pending: PendingState, timeout: float) -> bool:
+        """Waits for pending, a state that times out stops being tracked"""
+        if pending.wait(timeout):
+            return True
+        with self._lock:
+            if pending.confirmed:
+                return True
+            if pending in self._pending:
+                self._pending.remove(pending)
+            self.timeouts[pending.kind] = self.timeouts.get(pending.kind, 0) + 1
+        return False
+
+    def user_updated(self, user):
+        now = time.monotonic()
+        with self._lock:
+            for pending in list(self._pending):
+                if pending.predicate(user):
+                    self._pending.remove(pending)
+                    self._confirm(pending, now)
+
+    def _confirm(self, pending: PendingState, now: float):
+        pending.confirm(now)
+        histogram = self.histograms.setdefault(pending.kind, [0] * (len(self.buckets) + 1))
+        histogram[bisect.bisect_left(self.buckets, pending.latency)] += 1
+
+    def latency_histogram(self, kind: str) -> dict[str, int]:
+        """Confirmation counts keyed by the upper bound of each latency bucket in milliseconds"""
+        histogram = self.histograms.get(kind, [0] * (len(self.buckets) + 1))
+        labels = [f"<={bound * 1000:g}ms" for bound in self.buckets] + [f">{self.buckets[-1] * 1000:g}ms"]
+        return dict(zip(labels, histogram))
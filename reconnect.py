@@ -0,0 +1,90 @@
+import collections
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReconnectSupervisor(threading.Thread):
+    """
+    Reconnects after the server connection drops. connect is retried with exponential backoff and jitter until it
+    returns without raising, then on_reconnected restores the client state. The time from the drop until
+    on_reconnected has returned is kept in recovery_times, reconnects whose state could not be restored are counted in
+    failed_restores instead.
+    """
+
+    def __init__(self, connect, on_reconnected, initial_delay: float = 0.5, max_delay: float = 30.0,
+                 multiplier: float = 2.0, jitter: float = 0.5):
+        super().__init__(daemon=True)
+        self.connect = connect
+        self.on_reconnected = on_reconnected
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+        self.reconnects = 0
+        self.failed_attempts = 0
+        self.failed_restores = 0
+        self.recovery_times: collections.deque[float] = collections.deque(maxlen=20)
+
+        self._disconnected = threading.Event()
+        self._disconnected_at: float = None
+        self._stopped = False
+
+    @classmethod
+    def from_config(cls, config: dict, connect, on_reconnected) -> "ReconnectSupervisor":
+        return cls(connect, on_reconnected,
+                   initial_delay=config.get("InitialDelayMs", 500) / 1000,
+                   max_delay=config.get("MaxDelayMs", 30000) / 1000,
+                   multiplier=config.get("Multiplier", 2.0),
+                   jitter=config.get("Jitter", 0.5))
+
+    @property
+    def last_recovery_time(self) -> float:
+        return self.recovery_times[-1] if self.recovery_times else None
+
+    def disconnected(self):
+        """Call from pymumble's disconnected callback"""
+        if not self._disconnected.is_set():
+            self._disconnected_at = time.monotonic()
+            self._disconnected.set()
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before the given attempt, spread by +-jitter so clients dropped together do not retry together"""
+        delay = min(self.initial_delay * self.multiplier ** attempt, self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def stop(self):
+        self._stopped = True
+        self._disconnected.set()
+
+    def run(self):
+        while True:
+            self._disconnected.wait()
+            disconnected_at = self._disconnected_at
+            attempt = 0
+            while not self._stopped:
+                time.sleep(self.delay(attempt))
+                try:
+                    self.connect()
+                    break
+                except Exception:
+                    self.failed_attempts += 1
+                    attempt += 1
+            if self._stopped:
+                return
+
+            # The new connection may drop again while its state is being restored
+            self._disconnected.clear()
+            try:
+                self.on_reconnected()
+            except Exception:
+                # Keep supervising, a partly restored connection still beats giving up on reconnecting
+                logger.exception("Could not restore the client state after reconnecting")
+                self.failed_restores += 1
+                continue
+            self.reconnects += 1
+            self.recovery_times.append(time.monotonic() - disconnected_at)
@@ -0,0 +1,127 @@
+import audioop
+import collections
+import random
+
+SAMPLE_WIDTH = 2  # 16 bit PCM
+UNIFORM_NOISE_RMS = 32768 / 3 ** 0.5  # RMS of full scale uniform white noise
+
+
+class VoiceActivityDetector:
+    """
+    Frame based voice activity detection. A frame is speech when its RMS is threshold_ratio above an adaptive noise
+    floor (and above min_rms) and its zero-crossing rate is low enough to rule out hiss. The last pre_roll_frames
+    frames are kept so that word onsets are sent along with the first speech frame, and transmission carries on
+    for hang_frames frames after speech stops. The floor is also raised to the quietest frame of every
+    floor_window_frames window, so steady noise that starts above the threshold (a fan, the air conditioning) is
+    learnt as the new floor instead of holding the gate open forever.
+    """
+
+    def __init__(self, threshold_ratio: float = 3.0, min_rms: int = 200, max_zero_crossing_rate: float = 0.4,
+                 pre_roll_frames: int = 3, hang_frames: int = 15, floor_rise: float = 0.01, floor_fall: float = 0.5,
+                 initial_floor: float = 100.0, floor_window_frames: int = 150):
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.hang_frames = hang_frames
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.floor_window_frames = floor_window_frames
+
+        self.noise_floor = initial_floor
+        self.active = False
+
+        self._pre_roll: collections.deque[bytes] = collections.deque(maxlen=pre_roll_frames)
+        self._hang_remaining = 0
+        self._window_min = float("inf")
+        self._window_frames = 0
+
+    @classmethod
+    def from_config(cls, config: dict, frame_duration: float = 0.02) -> "VoiceActivityDetector":
+        return cls(threshold_ratio=config.get("ThresholdRatio", 3.0),
+                   min_rms=config.get("MinRms", 200),
+                   max_zero_crossing_rate=config.get("MaxZeroCrossingRate", 0.4),
+                   pre_roll_frames=round(config.get("PreRollMs", 60) / 1000 / frame_duration),
+                   hang_frames=round(config.get("HangMs", 300) / 1000 / frame_duration),
+                   floor_window_frames=round(config.get("FloorWindowMs", 3000) / 1000 / frame_duration))
+
+    def is_speech(self, frame: bytes) -> bool:
+        rms = audioop.rms(frame, SAMPLE_WIDTH)
+        self._track_window_minimum(rms)
+        loud = rms > self.min_rms and rms > self.noise_floor * self.threshold_ratio
+        if not loud:
+            # Follow the floor down quickly and up slowly, and never learn it from speech
+            rate = self.floor_fall if rms < self.noise_floor else self.floor_rise
+            self.noise_floor += (rms - self.noise_floor) * rate
+            return False
+
+        zero_crossing_rate = audioop.cross(frame, SAMPLE_WIDTH) / (len(frame) // SAMPLE_WIDTH)
+        return zero_crossing_rate <= self.max_zero_crossing_rate
+
+    def _track_window_minimum(self, rms: int):
+        self._window_min = min(self._window_min, rms)
+        self._window_frames += 1
+        if self._window_frames < self.floor_window_frames:
+            return
+        # Speech always has quieter gaps within a few seconds, so a window whose quietest frame is still above the
+        # floor means the background itself got louder
+        if self._window_min > self.noise_floor:
+            self.noise_floor = self._window_min
+        self._window_min = float("inf")
+        self._window_frames = 0
+
+    def process(self, frame: bytes) -> list[bytes]:
+        """Returns the frames to transmit for this input frame, which is empty during silence."""
+        if self.is_speech(frame):
+            self._hang_remaining = self.hang_frames
+            if not self.active:
+                self.active = True
+                frames = list(self._pre_roll)
+                self._pre_roll.clear()
+                frames.append(frame)
+                return frames
+            return [frame]
+
+        if self.active and self._hang_remaining > 0:
+            self._hang_remaining -= 1
+            return [frame]
+
+        self.active = False
+        self._pre_roll.append(frame)
+        return []
+
+
+def comfort_noise(size: int, rms: float) -> bytes:
+    """size bytes of white noise at the given RMS level"""
+    # Fresh noise every time, a repeated buffer would be heard as a periodic pattern
+    return audioop.mul(random.randbytes(size), SAMPLE_WIDTH, rms / UNIFORM_NOISE_RMS)
+
+
+class SilenceSuppressor:
+    """
+    Silence suppression for always talking users. Speech frames from the detector are passed on and nothing at all
+    is sent during silence, so an idle open channel costs nothing upstream and on the server. Listeners fill the
+    pauses with comfort noise themselves, see JitterBuffer.comfort_noise.
+    """
+
+    def __init__(self, vad: VoiceActivityDetector):
+        self.vad = vad
+
+        self.frames_in = 0
+        self.frames_sent = 0
+        self.frames_suppressed = 0
+
+    def __repr__(self):
+        return (f"SilenceSuppressor(frames_in={self.frames_in}, frames_sent={self.frames_sent}, "
+                f"frames_suppressed={self.frames_suppressed})")
+
+    def process(self, frame: bytes) -> list[bytes]:
+        self.frames_in += 1
+        frames = self.vad.process(frame)
+        if frames:
+            # The pre-roll frames sent along with an onset had been counted as suppressed
+            self.frames_suppressed = max(0, self.frames_suppressed - (len(frames) - 1))
+            self.frames_sent += len(frames)
+            return frames
+
+        self.frames_suppressed += 1
+        return []
@@ -0,0 +1,35 @@
+from channel_index import ChannelIndex
+from mumble_commands import ChannelVoiceTarget, Mumble
+
+FIRST_TARGET_ID = 1  # 0 is normal talking
+LAST_TARGET_ID = 30  # 31 is the server loopback
+
+
+class VoiceTargets:
+    """
+    Voice target ids for whispering to channels. Every channel gets its target registered on the server once, after
+    which transmitting to it only means setting sound_output.target, with no move and no server round trip.
+    Channels beyond the 30 available target ids are left unregistered.
+    """
+
+    def __init__(self):
+        self.ids: dict[str, int] = dict()
+
+    def register(self, mumble: Mumble, channel_index: ChannelIndex, channel_names: list[str]):
+        self.ids.clear()
+        for target_id, channel_name in zip(range(FIRST_TARGET_ID, LAST_TARGET_ID + 1), dict.fromkeys(channel_names)):
+            self.ids[channel_name] = target_id
+        self.replay(mumble, channel_index)
+
+    def replay(self, mumble: Mumble, channel_index: ChannelIndex):
+        """Sends every registered target to the server, targets only last as long as the connection"""
+        for channel_name, target_id in self.ids.items():
+            mumble.execute_command(ChannelVoiceTarget(target_id, channel_index.id_of(channel_name)), blocking=False)
+
+    def target_for(self, channel_name: str) -> int:
+        return self.ids.get(channel_name)
+
+    def channel_for(self, target_id: int) -> str:
+        for channel_name, channel_target_id in self.ids.items():
+            if channel_target_id == target_id:
+                return channel_name